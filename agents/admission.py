@@ -0,0 +1,211 @@
+"""
+Admission control for the agent servers.
+
+`AdmissionMiddleware` sits in front of each agent app and gates the JSON-RPC
+methods that run the agent (`message/send`, `message/stream`). At most
+`ADMISSION_MAX_IN_FLIGHT` of them run at once; further requests wait in a
+bounded FIFO queue for up to `ADMISSION_QUEUE_TIMEOUT` seconds. When the queue
+is full or the wait runs out the request is rejected right away with HTTP 429
+and a `Retry-After` estimate, so latency stays bounded under overload instead
+of piling up on OpenAI. Other methods (`tasks/get`, `tasks/cancel`, agent
+cards) are never queued.
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "32"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))
+
+GATED_METHODS = {"message/send", "message/stream"}
+# JSON-RPC "server error" range code for an overloaded agent
+SERVER_BUSY_CODE = -32000
+
+_controllers: dict[str, "AdmissionController"] = {}
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request can't be admitted; carries a Retry-After hint."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Max-in-flight limit with a bounded, time-limited FIFO wait queue."""
+
+    def __init__(
+        self,
+        name: str,
+        max_in_flight: int = ADMISSION_MAX_IN_FLIGHT,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+    ):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        # Moving average of how long an admitted request holds its slot
+        self._service_seconds = 1.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> float:
+        """Wait for a slot and return the time spent queued"""
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self._admit(0.0)
+            return 0.0
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected("queue full", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            # The slot may have been handed over just as the wait ran out
+            if not waiter.done():
+                waiter.cancel()
+                self._waiters.remove(waiter)
+                self.timed_out += 1
+                raise AdmissionRejected("queue timeout", self.retry_after())
+        except asyncio.CancelledError:
+            # Client went away while queued: give back a slot we were handed
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            raise
+        waited = time.monotonic() - started
+        self._admit(waited)
+        return waited
+
+    def release(self, service_seconds: float | None = None) -> None:
+        """Free a slot, handing it straight to the oldest waiter if there is one"""
+        if service_seconds is not None:
+            self._service_seconds += 0.2 * (service_seconds - self._service_seconds)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue has likely drained"""
+        backlog = (len(self._waiters) + 1) / max(1, self.max_in_flight)
+        return max(1, math.ceil(backlog * self._service_seconds))
+
+    def _admit(self, waited: float) -> None:
+        self.admitted += 1
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_seconds": round(self.wait_seconds / self.admitted, 4) if self.admitted else 0.0,
+            "max_wait_seconds": round(self.max_wait_seconds, 4),
+        }
+
+
+def get_admission_controller(name: str) -> AdmissionController:
+    """Return the process-wide controller for agent `name`, creating it on first use"""
+    controller = _controllers.get(name)
+    if controller is None:
+        controller = _controllers[name] = AdmissionController(name)
+    return controller
+
+
+def admission_stats() -> dict:
+    return {name: controller.stats() for name, controller in _controllers.items()}
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an `AdmissionController` to agent-running JSON-RPC calls."""
+
+    def __init__(self, app: ASGIApp, name: str):
+        self.app = app
+        self.controller = get_admission_controller(name)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        # Read the body to find the JSON-RPC method, then replay it to the app
+        messages: list[Message] = []
+        body = b""
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+
+        async def replay() -> Message:
+            return messages.pop(0) if messages else await receive()
+
+        request_id, method = _parse_jsonrpc(body)
+        if method not in GATED_METHODS:
+            await self.app(scope, replay, send)
+            return
+
+        try:
+            await self.controller.acquire()
+        except AdmissionRejected as e:
+            response = JSONResponse(
+                {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "error": {"code": SERVER_BUSY_CODE, "message": f"Agent is busy ({e}), retry later"},
+                },
+                status_code=429,
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            await response(scope, replay, send)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, replay, send)
+        finally:
+            self.controller.release(time.monotonic() - started)
+
+
+def _parse_jsonrpc(body: bytes) -> tuple[str | int | None, str | None]:
+    try:
+        request = json.loads(body)
+    except ValueError:
+        return None, None
+    if not isinstance(request, dict):
+        return None, None
+    return request.get("id"), request.get("method")
@@ -0,0 +1 @@
+"""Offline benchmarks for the agents; run with `python -m benchmarks` from agents/."""
@@ -0,0 +1,199 @@
+"""
+Offline benchmark for the travel packing agents.
+
+Starts the fake OpenAI and Exa servers (see `fakes.py`) in this process,
+launches the selected agents as separate processes pointed at them, and
+drives each agent over A2A JSON-RPC (`message/send` and `message/stream`) at
+a fixed concurrency. Queries are the examples from each agent's card, made
+unique per request so the response caches don't hide the real work (use
+`--repeat-queries` to measure the cached path instead).
+
+Reports throughput, p50/p95/p99 latency, time to first chunk and the agent
+process's memory. `--json` writes the numbers for comparing runs.
+
+    cd agents
+    python -m benchmarks --requests 200 --concurrency 16
+    python -m benchmarks --agents clothing search --llm-error-rate 0.05 --json before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.fakes import add_fake_arguments, build_fake_exa, build_fake_openai, fake_configs, serve
+from benchmarks.load import Sample, run_load
+from start_agents import AGENTS
+
+AGENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+METHODS = {"send": "message/send", "stream": "message/stream"}
+
+
+def percentile(values: list[float], p: float) -> float | None:
+    """Nearest-rank percentile of `values` (None when empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+def memory_mb(pid: int) -> dict:
+    """Current and peak resident memory of `pid` in MB (Linux only)"""
+    memory = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    memory["rss_mb" if key == "VmRSS" else "peak_rss_mb"] = round(int(value.split()[0]) / 1024, 1)
+    except OSError:
+        pass
+    return memory
+
+
+def summarize(samples: list[Sample], wall: float) -> dict:
+    latencies = [s.latency for s in samples if s.ok]
+    ttfts = [s.ttft for s in samples if s.ok and s.ttft is not None]
+
+    def ms(value):
+        return round(value * 1000, 1) if value is not None else None
+
+    return {
+        "requests": len(samples),
+        "ok": len(latencies),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "ttft_p50_ms": ms(percentile(ttfts, 50)),
+    }
+
+
+def start_agent(agent: dict, env: dict) -> subprocess.Popen:
+    # Run the interpreter directly (not `uv run`) so the pid is the agent's for memory readings
+    return subprocess.Popen(
+        [sys.executable, agent["file"]],
+        cwd=AGENTS_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_for_card(url: str, process: subprocess.Popen, timeout: float) -> dict | None:
+    """Poll the agent card until it answers; return it (None on timeout or crash)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and process.poll() is None:
+        try:
+            return httpx.get(f"{url}.well-known/agent.json", timeout=1).json()
+        except (httpx.HTTPError, ValueError):
+            time.sleep(0.1)
+    return None
+
+
+def queries(card: dict, count: int, tag: str | None) -> list[str]:
+    """`count` queries from the card's examples, made unique with `tag` unless it is None"""
+    examples = [example for skill in card.get("skills", []) for example in skill.get("examples") or []]
+    examples = examples or [card.get("description", "Help me pack")]
+    return [
+        f"{examples[i % len(examples)]} ({tag} {i})" if tag is not None else examples[i % len(examples)]
+        for i in range(count)
+    ]
+
+
+def print_report(results: list[dict]) -> None:
+    header = f"{'agent':22} {'method':7} {'ok':>9} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'ttft50':>8} {'rss MB':>7} {'peak MB':>8}"
+    print()
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        def cell(key, width):
+            value = r.get(key)
+            return f"{'-' if value is None else value:>{width}}"
+
+        print(
+            f"{r['agent']:22} {r['method']:7} {str(r['ok']) + '/' + str(r['requests']):>9} {cell('throughput_rps', 7)} "
+            f"{cell('p50_ms', 8)} {cell('p95_ms', 8)} {cell('p99_ms', 8)} {cell('ttft_p50_ms', 8)} "
+            f"{cell('rss_mb', 7)} {cell('peak_rss_mb', 8)}"
+        )
+    print("(latencies in ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the agents against local fake OpenAI and Exa servers")
+    names = [os.path.splitext(agent["file"])[0] for agent in AGENTS]
+    parser.add_argument("--agents", nargs="+", choices=names, default=names)
+    parser.add_argument("--methods", nargs="+", choices=list(METHODS), default=list(METHODS))
+    parser.add_argument("--requests", type=int, default=100, help="requests per agent and method")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat-queries", action="store_true", help="reuse the card examples as-is (cache hits)")
+    parser.add_argument("--ready-timeout", type=float, default=90.0)
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    add_fake_arguments(parser)
+    args = parser.parse_args()
+
+    openai_config, exa_config = fake_configs(args)
+    serve(build_fake_openai(openai_config), args.openai_port)
+    serve(build_fake_exa(exa_config), args.exa_port)
+
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.openai_port}/v1",
+        "EXA_API_KEY": "benchmark",
+        "EXA_API_BASE": f"http://127.0.0.1:{args.exa_port}",
+        "WEAVE_TRACING": "0",
+        "WANDB_MODE": "disabled",
+        # The fakes have no quota; don't let client-side pacing skew the numbers
+        "LLM_RPM": "0",
+        "LLM_TPM": "0",
+        "TASK_STORE": "memory",
+        "RESPONSE_CACHE_DB": "",
+    }
+    selected = [agent for agent in AGENTS if os.path.splitext(agent["file"])[0] in args.agents]
+
+    print(f"🚀 Starting {len(selected)} agent(s) against the fake upstreams...")
+    processes = {agent["file"]: start_agent(agent, env) for agent in selected}
+    results = []
+    try:
+        for agent in selected:
+            process = processes[agent["file"]]
+            url = f"http://localhost:{agent['port']}/"
+            card = wait_for_card(url, process, args.ready_timeout)
+            if card is None:
+                print(f"❌ {agent['name']} agent did not come up")
+                continue
+            name = card.get("name", agent["name"])
+            for method in args.methods:
+                texts = queries(card, args.requests, None if args.repeat_queries else f"{method} request")
+                print(f"{agent['emoji']} {name}: {args.requests} x {METHODS[method]} at concurrency {args.concurrency}")
+                samples, wall = asyncio.run(run_load(url, texts, METHODS[method], args.concurrency))
+                results.append({
+                    "agent": name,
+                    "method": method,
+                    **summarize(samples, wall),
+                    **memory_mb(process.pid),
+                })
+    finally:
+        for process in processes.values():
+            process.terminate()
+        for process in processes.values():
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"📝 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Local stand-ins for the OpenAI and Exa APIs.
+
+The fake OpenAI server answers `/v1/chat/completions` (plain and streamed,
+with usage) and the fake Exa server answers `/search`, each after a
+configurable latency, at a configurable token rate and with a configurable
+share of injected errors (429 with Retry-After, or 500), so the agents can
+be benchmarked without network access or API keys.
+
+    python -m benchmarks.fakes --openai-port 8900 --exa-port 8901 --llm-latency 0.3
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+WORDS = (
+    "pack light layers a rain jacket comfortable walking shoes sunscreen "
+    "an adapter copies of your passport and a reusable water bottle"
+).split()
+
+
+@dataclass
+class FakeConfig:
+    """Behavior of a fake upstream."""
+
+    # Seconds before the first token (or the whole response)
+    latency: float = 0.3
+    # Streamed output speed; 0 streams everything at once
+    tokens_per_second: float = 50.0
+    answer_tokens: int = 60
+    # Share of requests failing with a 429 (half) or a 500 (half)
+    error_rate: float = 0.0
+    retry_after_ms: int = 200
+
+
+def _injected_error(config: FakeConfig) -> Response | None:
+    if random.random() >= config.error_rate:
+        return None
+    if random.random() < 0.5:
+        return JSONResponse(
+            {"error": {"message": "Rate limit reached (injected)", "type": "requests"}},
+            status_code=429,
+            headers={"retry-after-ms": str(config.retry_after_ms)},
+        )
+    return JSONResponse({"error": {"message": "Internal error (injected)", "type": "server_error"}}, status_code=500)
+
+
+def build_fake_openai(config: FakeConfig) -> Starlette:
+    """OpenAI-compatible chat completions server"""
+
+    async def chat_completions(request: Request) -> Response:
+        body = await request.json()
+        error = _injected_error(config)
+        if error is not None:
+            return error
+        words = [WORDS[i % len(WORDS)] for i in range(config.answer_tokens)]
+        prompt_tokens = sum(len(m.get("content") or "") for m in body["messages"]) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(words),
+            "total_tokens": prompt_tokens + len(words),
+        }
+        chunk = {"id": "fake", "object": "chat.completion.chunk", "created": int(time.time()), "model": body["model"]}
+
+        if not body.get("stream"):
+            duration = config.latency
+            if config.tokens_per_second:
+                duration += len(words) / config.tokens_per_second
+            await asyncio.sleep(duration)
+            return JSONResponse({
+                "id": "fake",
+                "object": "chat.completion",
+                "created": chunk["created"],
+                "model": body["model"],
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+
+        async def events():
+            await asyncio.sleep(config.latency)
+            for i, word in enumerate(words):
+                if config.tokens_per_second:
+                    await asyncio.sleep(1 / config.tokens_per_second)
+                delta = {"content": word if i == 0 else f" {word}"}
+                yield f"data: {json.dumps({**chunk, 'choices': [{'index': 0, 'delta': delta, 'finish_reason': None}]})}\n\n"
+            yield f"data: {json.dumps({**chunk, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})}\n\n"
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield f"data: {json.dumps({**chunk, 'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return Starlette(routes=[Route("/v1/chat/completions", chat_completions, methods=["POST"])])
+
+
+def build_fake_exa(config: FakeConfig) -> Starlette:
+    """Exa-compatible `/search` server (search_and_contents with text)"""
+
+    async def search(request: Request) -> Response:
+        body = await request.json()
+        await asyncio.sleep(config.latency)
+        error = _injected_error(config)
+        if error is not None:
+            return error
+        max_characters = ((body.get("contents") or {}).get("text") or {}).get("maxCharacters", 1000)
+        text = " ".join(WORDS * 20)[:max_characters]
+        slug = "-".join(body["query"].lower().split())[:60]
+        return JSONResponse({
+            "requestId": "fake",
+            "results": [
+                {"id": str(i), "title": f"Result {i + 1} for {body['query']}", "url": f"https://example.com/{slug}/{i}", "text": text}
+                for i in range(body.get("numResults", 3))
+            ],
+        })
+
+    return Starlette(routes=[Route("/search", search, methods=["POST"])])
+
+
+def serve(app: Starlette, port: int) -> uvicorn.Server:
+    """Run `app` on localhost:`port` in a daemon thread and return its server"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name=f"fake-{port}", daemon=True).start()
+    return server
+
+
+def add_fake_arguments(parser: argparse.ArgumentParser) -> None:
+    """Command-line options shaping the fake upstreams"""
+    parser.add_argument("--openai-port", type=int, default=8900)
+    parser.add_argument("--exa-port", type=int, default=8901)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds to first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--llm-answer-tokens", type=int, default=60)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--exa-latency", type=float, default=0.2)
+    parser.add_argument("--exa-error-rate", type=float, default=0.0)
+
+
+def fake_configs(args: argparse.Namespace) -> tuple[FakeConfig, FakeConfig]:
+    """(OpenAI, Exa) configs from parsed `add_fake_arguments` options"""
+    return (
+        FakeConfig(
+            latency=args.llm_latency,
+            tokens_per_second=args.llm_tokens_per_second,
+            answer_tokens=args.llm_answer_tokens,
+            error_rate=args.llm_error_rate,
+        ),
+        FakeConfig(latency=args.exa_latency, error_rate=args.exa_error_rate),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run fake OpenAI and Exa servers")
+    add_fake_arguments(parser)
+    args = parser.parse_args()
+    openai_config, exa_config = fake_configs(args)
+
+    serve(build_fake_openai(openai_config), args.openai_port)
+    serve(build_fake_exa(exa_config), args.exa_port)
+    print(f"🤖 Fake OpenAI: http://127.0.0.1:{args.openai_port}/v1")
+    print(f"🔍 Fake Exa:    http://127.0.0.1:{args.exa_port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+A2A JSON-RPC load generator.
+
+Sends `message/send` or `message/stream` requests to one agent at a fixed
+concurrency and records, per request, the end-to-end latency, the time to
+the first artifact chunk (streaming only) and whether the task completed.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from dataclasses import dataclass
+
+import httpx
+
+
+@dataclass
+class Sample:
+    """Outcome of one benchmark request."""
+
+    latency: float
+    ttft: float | None
+    ok: bool
+
+
+def _request(method: str, text: str) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "id": str(uuid.uuid4()),
+        "method": method,
+        "params": {
+            "message": {
+                "kind": "message",
+                "messageId": str(uuid.uuid4()),
+                "role": "user",
+                "parts": [{"kind": "text", "text": text}],
+            }
+        },
+    }
+
+
+async def send(client: httpx.AsyncClient, url: str, text: str) -> Sample:
+    """One `message/send` request, complete when the finished task comes back"""
+    started = time.perf_counter()
+    try:
+        response = await client.post(url, json=_request("message/send", text))
+        result = response.json().get("result") or {}
+        ok = response.status_code == 200 and result.get("status", {}).get("state") == "completed"
+    except (httpx.HTTPError, ValueError):
+        ok = False
+    return Sample(time.perf_counter() - started, None, ok)
+
+
+async def stream(client: httpx.AsyncClient, url: str, text: str) -> Sample:
+    """One `message/stream` request, timing the first artifact chunk and the final status"""
+    started = time.perf_counter()
+    ttft = None
+    ok = False
+    try:
+        async with client.stream("POST", url, json=_request("message/stream", text)) as response:
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[5:]).get("result") or {}
+                if event.get("kind") == "artifact-update" and ttft is None:
+                    ttft = time.perf_counter() - started
+                elif event.get("kind") == "status-update" and event.get("final"):
+                    ok = event["status"]["state"] == "completed"
+    except (httpx.HTTPError, ValueError):
+        ok = False
+    return Sample(time.perf_counter() - started, ttft, ok)
+
+
+async def run_load(
+    url: str,
+    texts: list[str],
+    method: str = "message/send",
+    concurrency: int = 8,
+    timeout: float = 120.0,
+) -> tuple[list[Sample], float]:
+    """Send one request per text, `concurrency` at a time; return the samples and wall time"""
+    request = send if method == "message/send" else stream
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    pending = iter(texts)
+    samples: list[Sample] = []
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        for text in pending:
+            samples.append(await request(client, url, text))
+
+    started = time.perf_counter()
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return samples, time.perf_counter() - started
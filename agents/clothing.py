@@ -6,46 +6,48 @@ load_dotenv()
 
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
+from a2a.server.tasks import TaskStore
 from a2a.types import (
     AgentCapabilities,
     AgentCard,
     AgentSkill,
 )
-from a2a.server.agent_execution import AgentExecutor, RequestContext
-from a2a.server.events import EventQueue
-from a2a.utils import new_agent_text_message
 from a2a.types import (
     Message
 )
-import openai
-import weave
-
-# Initialize Weave (optional)
-try:
-    weave.init('a2a-clothing-agent')
-    print("✅ Weave initialized for clothing agent")
-    weave_op = weave.op
-except Exception as e:
-    print(f"⚠️  Weave initialization failed: {e}")
-    print("Agent will run without Weave tracing")
-    # Create a no-op decorator when weave is not available
-    def weave_op(func):
-        return func
+from admission import AdmissionMiddleware
+from deadline import agent_deadline
+from intent_router import COMMON_INTENTS, card_reply, get_intent_router
+from metrics import add_metrics
+from model_router import choose_tier, tiered_completion
+from response_cache import get_response_cache
+from streaming import StreamingAgentExecutor
+from task_store import create_task_store
+from tracing import start_tracing, traced
 
 class ClothingAgent:
     """Clothing Agent for travel packing recommendations."""
 
-    @weave_op
-    async def invoke(self, message: Message) -> str:
-        response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a professional clothing and fashion consultant specializing in travel packing. You help travelers choose the right clothing for their destination, weather conditions, duration, and activities. Consider factors like climate, local dress codes, activities planned, laundry availability, and packing space. Provide specific clothing recommendations with quantities (e.g., '3 t-shirts, 2 pairs of jeans'). Consider versatile pieces that can be mixed and matched. Always consider the destination's weather, cultural norms, and the traveler's planned activities."},
-                {"role": "user", "content": message.parts[0].root.text}
-            ]
+    @traced('clothing_agent')
+    async def invoke(self, message: Message, on_delta=None) -> str:
+        user_message = message.parts[0].root.text
+        # Greetings and "what can you do" are answered from the agent card
+        intent = get_intent_router('clothing_agent', COMMON_INTENTS).match(user_message)
+        if intent is not None:
+            return card_reply(public_agent_card, intent)
+        messages = [
+            {"role": "system", "content": "You are a professional clothing and fashion consultant specializing in travel packing. You help travelers choose the right clothing for their destination, weather conditions, duration, and activities. Consider factors like climate, local dress codes, activities planned, laundry availability, and packing space. Provide specific clothing recommendations with quantities (e.g., '3 t-shirts, 2 pairs of jeans'). Consider versatile pieces that can be mixed and matched. Always consider the destination's weather, cultural norms, and the traveler's planned activities."},
+            {"role": "user", "content": user_message}
+        ]
+        # Answers are cached per model, so fast-tier answers stay separate
+        tier = choose_tier('clothing_agent', messages, output_tokens=500)
+        return await get_response_cache().get_or_compute(
+            'clothing_agent',
+            user_message,
+            tier.model,
+            lambda on_delta: tiered_completion(tier, messages, on_delta=on_delta),
+            on_delta=on_delta,
         )
-        return response.choices[0].message.content
 
 skill = AgentSkill(
     id='clothing_agent',
@@ -72,39 +74,45 @@ public_agent_card = AgentCard(
 )
 
 
-class ClothingAgentExecutor(AgentExecutor):
+class ClothingAgentExecutor(StreamingAgentExecutor):
     """Clothing Agent Implementation."""
 
+    deadline = agent_deadline('clothing_agent')
+
     def __init__(self):
         self.agent = ClothingAgent()
 
-    async def execute(
-        self,
-        context: RequestContext,
-        event_queue: EventQueue,
-    ) -> None:
-        result = await self.agent.invoke(context.message)
-        await event_queue.enqueue_event(new_agent_text_message(result))
-
-    async def cancel(
-        self, context: RequestContext, event_queue: EventQueue
-    ) -> None:
-        raise Exception('cancel not supported')
 
+def build_app(url: str | None = None, task_store: TaskStore | None = None):
+    """Build the Starlette app serving this agent"""
+    agent_card = public_agent_card
+    if url is not None:
+        agent_card = public_agent_card.model_copy(update={'url': url})
+    if task_store is None:
+        task_store = create_task_store('clothing_agent')
 
-def main():
     request_handler = DefaultRequestHandler(
         agent_executor=ClothingAgentExecutor(),
-        task_store=InMemoryTaskStore(),
+        task_store=task_store,
     )
 
     server = A2AStarletteApplication(
-        agent_card=public_agent_card,
+        agent_card=agent_card,
         http_handler=request_handler,
-        extended_agent_card=public_agent_card,
+        extended_agent_card=agent_card,
     )
+    # Weave is set up in the background once the server starts, never before it listens
+    app = server.build(
+        on_startup=[lambda: start_tracing('a2a-clothing-agent')],
+        on_shutdown=[task_store.close],
+    )
+    app.add_middleware(AdmissionMiddleware, name='clothing_agent')
+    add_metrics(app, agent_card.name)
+    return app
+
 
-    uvicorn.run(server.build(), host='0.0.0.0', port=9998)
+def main():
+    uvicorn.run(build_app(), host='0.0.0.0', port=9998)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
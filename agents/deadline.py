@@ -0,0 +1,109 @@
+"""
+Per-request deadline budgets for the agents.
+
+Every A2A request gets a latency budget: the agent's default (`AGENT_DEADLINE_MS`,
+or e.g. `SEARCH_AGENT_DEADLINE_MS` for one agent) unless the message metadata
+carries `deadlineMs`. The executor runs `invoke` with that deadline as the
+current one, so agents can split what is left across their upstream calls
+(see `within_deadline`) and answer with a degraded result instead of hanging
+when an upstream call is too slow.
+"""
+
+import asyncio
+import os
+import time
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Coroutine
+
+from a2a.types import Message
+
+from single_flight import OnDelta
+
+AGENT_DEADLINE_MS = float(os.getenv("AGENT_DEADLINE_MS", "30000"))
+# Extra time the executor waits past the deadline so agents can send their fallback
+DEADLINE_GRACE = float(os.getenv("DEADLINE_GRACE", "1.0"))
+
+_current: ContextVar["Deadline | None"] = ContextVar("deadline", default=None)
+_degraded = 0
+
+
+def agent_deadline(agent_id: str) -> float:
+    """Default budget in seconds for `agent_id`, e.g. from SEARCH_AGENT_DEADLINE_MS"""
+    return float(os.getenv(f"{agent_id.upper()}_DEADLINE_MS", AGENT_DEADLINE_MS)) / 1000
+
+
+class Deadline:
+    """The point in time by which a request must be answered."""
+
+    def __init__(self, seconds: float):
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def for_message(cls, message: Message | None, default: float) -> "Deadline":
+        """Use the message's `deadlineMs` metadata if present, else `default` seconds"""
+        metadata = (message.metadata if message is not None else None) or {}
+        try:
+            return cls(max(0.0, float(metadata["deadlineMs"])) / 1000)
+        except (KeyError, TypeError, ValueError):
+            return cls(default)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def share(self, fraction: float) -> float:
+        """A fraction of the remaining budget, for one step of a multi-step answer"""
+        return self.remaining() * fraction
+
+
+def current_deadline() -> Deadline:
+    """The deadline of the request being served (a default budget outside requests)"""
+    deadline = _current.get()
+    return deadline if deadline is not None else Deadline(AGENT_DEADLINE_MS / 1000)
+
+
+def create_task_with_deadline(coro: Coroutine, deadline: Deadline) -> asyncio.Task:
+    """Start `coro` as a task that sees `deadline` as its current deadline"""
+    token = _current.set(deadline)
+    try:
+        return asyncio.create_task(coro)
+    finally:
+        _current.reset(token)
+
+
+def record_degraded() -> None:
+    global _degraded
+    _degraded += 1
+
+
+def deadline_stats() -> dict:
+    return {"degraded": _degraded}
+
+
+async def within_deadline(
+    fn: Callable[[OnDelta | None], Awaitable[str]],
+    timeout: float,
+    fallback: Callable[[], str],
+    on_delta: OnDelta | None = None,
+) -> str:
+    """Run `fn(on_delta)` for at most `timeout` seconds, answering `fallback()` past that.
+
+    Text already streamed is kept and the fallback is streamed after it, so
+    clients always end up with one coherent answer.
+    """
+    streamed: list[str] = []
+
+    async def tee(delta: str) -> None:
+        streamed.append(delta)
+        await on_delta(delta)
+
+    try:
+        return await asyncio.wait_for(fn(tee if on_delta is not None else None), timeout)
+    except asyncio.TimeoutError:
+        record_degraded()
+        text = fallback()
+        if streamed:
+            text = "\n\n" + text
+        if on_delta is not None:
+            await on_delta(text)
+        return "".join(streamed) + text
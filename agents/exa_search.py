@@ -0,0 +1,233 @@
+"""
+Async Exa search layer for the search agent.
+
+Wraps `AsyncExa` with a pooled HTTP client, a TTL cache keyed on the
+normalized query and single-flight coalescing of identical in-flight
+queries. Only the amount of page text the agent actually uses is requested
+from Exa.
+
+`search_many` runs several rewrites of a query (see `rewrite_query`)
+concurrently and hands over de-duplicated results as they arrive, returning
+as soon as enough are in so the answer can start before the slowest query.
+"""
+
+import asyncio
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+import httpx
+from exa_py import AsyncExa
+
+from metrics import CACHE_LOOKUPS, EXA_ERRORS, EXA_LATENCY
+from response_cache import LRUCache, normalize_text
+from single_flight import get_single_flight
+
+EXA_API_BASE = os.getenv("EXA_API_BASE", "https://api.exa.ai")
+EXA_NUM_RESULTS = int(os.getenv("EXA_NUM_RESULTS", "3"))
+EXA_MAX_CHARACTERS = int(os.getenv("EXA_MAX_CHARACTERS", "200"))
+EXA_TIMEOUT = float(os.getenv("EXA_TIMEOUT", "15"))
+EXA_MAX_CONNECTIONS = int(os.getenv("EXA_MAX_CONNECTIONS", "20"))
+EXA_CACHE_SIZE = int(os.getenv("EXA_CACHE_SIZE", "512"))
+EXA_CACHE_TTL = float(os.getenv("EXA_CACHE_TTL", "900"))
+
+_WORD = re.compile(r"[\w'-]+")
+# Alternatives in one ask ("Lisbon or Porto", "X vs Y") are searched separately
+_SEPARATORS = {"or", "vs", "vs.", "versus"}
+_STOPWORDS = {
+    "a", "an", "the", "to", "for", "in", "on", "of", "at", "is", "are", "what", "whats", "what's",
+    "where", "which", "how", "do", "does", "can", "should", "i", "me", "my", "we", "our", "some",
+    "any", "search", "find", "tell", "about", "please", "best", "good", "and", "or",
+}
+
+
+def _keywords(text: str) -> str:
+    return " ".join(word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS)
+
+
+def _is_name(token: str) -> bool:
+    """Part of a capitalized name such as "New York" or "Washington, D.C." """
+    return token[:1].isupper() and _keywords(token) != ""
+
+
+def _alternatives(query: str) -> list[str]:
+    """Each alternative of a compound ask with the shared context kept, or [] if there are none
+
+    "Is Lisbon or Porto better for food?" -> ["lisbon better food", "porto better food"]
+    """
+    segments: list[list[str]] = [[]]
+    for token in query.split():
+        if token.lower() in _SEPARATORS:
+            segments.append([])
+        else:
+            segments[-1].append(token)
+    if len(segments) < 2 or not all(segments):
+        return []
+
+    # The alternatives at either end are the (capitalized) name or single word
+    # next to the separator; the words beyond them are context shared by all
+    first, last = segments[0], segments[-1]
+    start = len(first) - 1
+    while start > 0 and _is_name(first[start]) and _is_name(first[start - 1]):
+        start -= 1
+    end = 1
+    while end < len(last) and _is_name(last[end - 1]) and _is_name(last[end]):
+        end += 1
+    prefix, suffix = first[:start], last[end:]
+    options = [first[start:], *segments[1:-1], last[:end]]
+    return [_keywords(" ".join(prefix + option + suffix)) for option in options]
+
+
+def rewrite_query(query: str, limit: int) -> list[str]:
+    """The query plus up to `limit - 1` deterministic rewrites: each alternative of a compound ask, or its keywords"""
+    parts = _alternatives(query)
+    # Searching only some of the alternatives would skew the answer towards them
+    if len(parts) + 1 > limit:
+        parts = []
+    candidates = [query, *parts, _keywords(query)]
+
+    queries: list[str] = []
+    seen: set[str] = set()
+    for candidate in candidates:
+        key = normalize_text(candidate)
+        if key and key not in seen:
+            seen.add(key)
+            queries.append(candidate)
+    return queries[:limit]
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    """A single search hit, trimmed to what the agent uses."""
+
+    title: str
+    url: str
+    text: str
+
+
+class ExaSearch:
+    """Cached, coalescing async client for Exa search."""
+
+    def __init__(
+        self,
+        api_key: str,
+        api_base: str = EXA_API_BASE,
+        num_results: int = EXA_NUM_RESULTS,
+        max_characters: int = EXA_MAX_CHARACTERS,
+    ):
+        self.exa = AsyncExa(api_key=api_key, api_base=api_base)
+        # Replace the SDK's default client so connections are pooled with our limits
+        self.exa._client = httpx.AsyncClient(
+            base_url=self.exa.base_url,
+            headers=self.exa.headers,
+            timeout=httpx.Timeout(EXA_TIMEOUT, connect=5.0),
+            limits=httpx.Limits(max_connections=EXA_MAX_CONNECTIONS),
+        )
+        self.num_results = num_results
+        self.max_characters = max_characters
+        self.cache = LRUCache(max_size=EXA_CACHE_SIZE, ttl=EXA_CACHE_TTL)
+        self.hits = 0
+        self.misses = 0
+
+    async def search(self, query: str) -> list[SearchResult]:
+        """Return the top results for `query`, served from cache when possible"""
+        key = normalize_text(query)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            CACHE_LOOKUPS.inc(cache="exa", result="hit")
+            return cached
+
+        self.misses += 1
+        CACHE_LOOKUPS.inc(cache="exa", result="miss")
+        return await get_single_flight("exa").do(key, lambda _: self._fetch(key, query))
+
+    async def _fetch(self, key: str, query: str) -> list[SearchResult]:
+        started = time.monotonic()
+        try:
+            response = await self.exa.search_and_contents(
+                query,
+                text={"max_characters": self.max_characters},
+                num_results=self.num_results,
+            )
+        except Exception as e:
+            EXA_ERRORS.inc(error=type(e).__name__)
+            raise
+        EXA_LATENCY.observe(time.monotonic() - started)
+        results = [
+            SearchResult(title=item.title or "", url=item.url, text=item.text or "")
+            for item in response.results
+        ]
+        self.cache.set(key, results)
+        return results
+
+    async def search_many(
+        self,
+        queries: list[str],
+        timeout: float,
+        min_results: int,
+        on_result: Callable[[SearchResult], Awaitable[None]] | None = None,
+        rewrite_weight: float = 0.5,
+    ) -> list[SearchResult]:
+        """Run `queries` concurrently and return their results, de-duplicated by URL.
+
+        `queries[0]` is the query as typed; results from the rewrites after it
+        count `rewrite_weight` towards `min_results`, and the as-typed results
+        come first in the returned list. Returns once enough results are in,
+        every query is done or `timeout` runs out; the queries still running
+        are canceled. `on_result` is awaited with each new result as it
+        arrives. Raises the last error if every query failed.
+        """
+        async def run(index: int, query: str) -> tuple[int, list[SearchResult]]:
+            return index, await self.search(query)
+
+        tasks = [asyncio.create_task(run(index, query)) for index, query in enumerate(queries)]
+        results: list[SearchResult] = []
+        seen: set[str] = set()
+        as_typed: set[str] = set()
+        weight = 0.0
+        error: Exception | None = None
+        try:
+            for finished in asyncio.as_completed(tasks, timeout=timeout):
+                try:
+                    index, batch = await finished
+                except asyncio.TimeoutError:
+                    raise
+                except Exception as e:
+                    error = e
+                    continue
+                for result in batch:
+                    if index == 0:
+                        as_typed.add(result.url)
+                    if result.url in seen:
+                        continue
+                    seen.add(result.url)
+                    results.append(result)
+                    weight += 1.0 if index == 0 else rewrite_weight
+                    if on_result is not None:
+                        await on_result(result)
+                if weight >= min_results:
+                    break
+        except asyncio.TimeoutError:
+            if not results and error is None:
+                raise
+        finally:
+            for task in tasks:
+                task.cancel()
+        if not results and error is not None:
+            raise error
+        # Stable sort: the as-typed query's results first, each group in arrival order
+        results.sort(key=lambda result: result.url not in as_typed)
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.cache),
+        }
+
+    async def close(self) -> None:
+        await self.exa.client.aclose()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+A2A Travel Packing Agents - Single-process host
+
+Serves every agent from one uvicorn server, each mounted under its own path
+(e.g. http://localhost:9990/clothing/) with a matching agent-card URL. All
+agents share one import pass, the pooled HTTP clients and one task store.
+The per-port mode (`python <agent>.py` / start_agents.py) is still available.
+"""
+
+import argparse
+import importlib
+import os
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.routing import Mount, Route
+
+from llm_client import close_client
+from metrics import metrics_endpoint
+from specialists import close_http_client
+from task_store import TASK_STORE, create_task_store
+from tracing import start_tracing
+
+HOST_PORT = int(os.getenv("AGENT_HOST_PORT", "9990"))
+
+# (module, mount path)
+AGENTS = [
+    ("personal_belongings", "personal-belongings"),
+    ("clothing", "clothing"),
+    ("search", "search"),
+    ("documents", "documents"),
+    ("research", "research"),
+    ("packing", "packing"),
+]
+
+
+def build_host_app(base_url: str, task_store_kind: str = TASK_STORE) -> Starlette:
+    """Mount every agent app under its own path on one Starlette app"""
+    shutdown_hooks = []
+    # Metrics for every mounted agent, labeled by agent (each mount also serves its own)
+    routes = [Route("/metrics", metrics_endpoint, methods=["GET"])]
+    for module_name, path in AGENTS:
+        # The packing agent reaches the specialists through their mounts
+        os.environ.setdefault(f"{module_name.upper()}_AGENT_URL", f"{base_url}/{path}/")
+    for module_name, path in AGENTS:
+        module = importlib.import_module(module_name)
+        # One store per agent, so an agent can't read or cancel another agent's tasks
+        task_store = create_task_store(f"{module_name}_agent", task_store_kind)
+        app = module.build_app(url=f"{base_url}/{path}/", task_store=task_store)
+        # Mounted apps don't run their own lifespan: their shutdown hooks (closing the
+        # task store, the Exa client, ...) run with the host's
+        shutdown_hooks += app.router.on_shutdown
+        routes.append(Mount(f"/{path}", app=app))
+    # Mounted apps don't run their own startup hooks: trace everything under one project
+    return Starlette(
+        routes=routes,
+        on_startup=[lambda: start_tracing('a2a-travel-agents')],
+        on_shutdown=[close_client, close_http_client, *shutdown_hooks],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run all travel packing agents in one process")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=HOST_PORT)
+    parser.add_argument(
+        "--base-url",
+        help="Public base URL advertised in agent cards (default: http://localhost:<port>)",
+    )
+    parser.add_argument("--task-store", choices=["memory", "sqlite"], default=TASK_STORE)
+    args = parser.parse_args()
+
+    base_url = (args.base_url or f"http://localhost:{args.port}").rstrip("/")
+    app = build_host_app(base_url, args.task_store)
+
+    print("🧳 Hosting all travel packing agents in one process")
+    for _, path in AGENTS:
+        print(f"  {path:20}: {base_url}/{path}/")
+
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Deterministic intent routing shared by the agents.
+
+An `IntentRouter` compiles its intents into one regex alternation with a
+named group per intent and matches a message in a single pass, instead of
+lowercasing it and scanning keyword lists once per intent. When several
+intents match, the one registered first wins. Intents marked `local` are
+answered by a handler or template in the agent without calling the LLM;
+`router_stats()` reports how much traffic that covers.
+"""
+
+import re
+from dataclasses import dataclass
+
+from a2a.types import AgentCard
+
+
+@dataclass(frozen=True)
+class Intent:
+    """A named intent and the pattern (regex source, case-insensitive) that detects it."""
+
+    name: str
+    pattern: str
+    # Answered without the LLM
+    local: bool = True
+
+
+# Trivial asks every agent answers from its card; anchored to the whole message,
+# so a greeting followed by a real question still reaches the LLM
+COMMON_INTENTS = [
+    Intent("greeting", r"\A\s*(?:hi|hello|hey|thanks|thank you)\b[\s!.,]*\Z"),
+    Intent("help", r"\A\s*(?:help|what can you do|what do you do|how do you work)\b[\s?!.]*\Z"),
+]
+
+
+class IntentRouter:
+    """Single-pass, priority-ordered matcher over a fixed set of intents."""
+
+    def __init__(self, name: str, intents: list[Intent]):
+        self.name = name
+        self.intents = {intent.name: intent for intent in intents}
+        self._priority = {intent.name: i for i, intent in enumerate(intents)}
+        self._pattern = re.compile(
+            "|".join(f"(?P<{intent.name}>{intent.pattern})" for intent in intents),
+            re.IGNORECASE,
+        )
+        self.messages = 0
+        self.local = 0
+        self.routed = {intent.name: 0 for intent in intents}
+
+    def match(self, text: str) -> Intent | None:
+        """The highest-priority intent found in `text`, or None for open-ended messages"""
+        self.messages += 1
+        best = None
+        for found in self._pattern.finditer(text):
+            if best is None or self._priority[found.lastgroup] < self._priority[best]:
+                best = found.lastgroup
+                if self._priority[best] == 0:
+                    break
+        if best is None:
+            return None
+        intent = self.intents[best]
+        self.routed[best] += 1
+        if intent.local:
+            self.local += 1
+        return intent
+
+    def stats(self) -> dict:
+        return {
+            "messages": self.messages,
+            "local": self.local,
+            "local_share": self.local / self.messages if self.messages else 0.0,
+            **{f"routed_{name}": count for name, count in self.routed.items()},
+        }
+
+
+_routers: dict[str, IntentRouter] = {}
+
+
+def get_intent_router(name: str, intents: list[Intent]) -> IntentRouter:
+    """Return the process-wide router for agent `name`, compiling it on first use"""
+    router = _routers.get(name)
+    if router is None:
+        router = _routers[name] = IntentRouter(name, intents)
+    return router
+
+
+def router_stats() -> dict:
+    return {name: router.stats() for name, router in _routers.items()}
+
+
+def card_reply(card: AgentCard, intent: Intent) -> str:
+    """Template answer for the common intents, built from the agent card"""
+    if intent.name == "greeting":
+        opener = f"Hi! I'm the {card.name}."
+    else:
+        opener = f"I'm the {card.name}: {card.description}."
+    examples = [example for skill in card.skills for example in skill.examples or []]
+    if not examples:
+        return opener
+    return opener + " Try asking me:\n" + "\n".join(f"- {example}" for example in examples)
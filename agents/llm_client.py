@@ -0,0 +1,190 @@
+"""
+Shared async OpenAI client for the travel packing agents.
+
+Every agent talks to OpenAI through a single `AsyncOpenAI` instance backed by a
+pooled keep-alive HTTP connection, so concurrent A2A requests overlap instead of
+blocking the uvicorn event loop.
+
+Calls are paced by the shared rate limiter (see `rate_limit.py`) and transient
+failures (429, 5xx, connection errors) are retried with jittered exponential
+backoff, honoring the server's `Retry-After`.
+
+Calls may target another OpenAI-compatible endpoint (e.g. a local model
+server, see `model_router.py`) through `base_url`; those get their own pooled
+client and are not paced by the OpenAI rate limiter.
+"""
+
+import asyncio
+import os
+import random
+import time
+from typing import Awaitable, Callable
+
+import httpx
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    AsyncOpenAI,
+    DefaultAsyncHttpxClient,
+    InternalServerError,
+    NOT_GIVEN,
+    RateLimitError,
+)
+from openai.types import CompletionUsage
+
+from metrics import COMPLETION_TOKENS, LLM_ERRORS, LLM_LATENCY, PROMPT_TOKENS
+from rate_limit import estimate_tokens, get_rate_limiter
+
+DEFAULT_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
+
+# Connection pool and timeout settings (seconds)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "20"))
+
+RETRYABLE_ERRORS = (RateLimitError, InternalServerError, APIConnectionError)
+
+_retries = 0
+
+_clients: dict[str | None, AsyncOpenAI] = {}
+
+
+def get_client(base_url: str | None = None, api_key: str | None = None) -> AsyncOpenAI:
+    """Return the process-wide AsyncOpenAI client for `base_url` (default: OpenAI), creating it on first use"""
+    client = _clients.get(base_url)
+    if client is None:
+        http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+        )
+        # Retries are done in chat_completion so they go through the rate limiter
+        client = _clients[base_url] = AsyncOpenAI(
+            http_client=http_client,
+            max_retries=0,
+            base_url=base_url,
+            # Local servers usually ignore the key, but the SDK requires one
+            api_key=api_key or os.getenv("OPENAI_API_KEY") or ("local" if base_url else None),
+        )
+    return client
+
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """Seconds to wait before retry `attempt`: the server's Retry-After, else jittered backoff"""
+    if isinstance(error, APIStatusError):
+        headers = error.response.headers
+        try:
+            if "retry-after-ms" in headers:
+                return float(headers["retry-after-ms"]) / 1000
+            if "retry-after" in headers:
+                return float(headers["retry-after"])
+        except ValueError:
+            pass
+    # Full jitter keeps retrying clients from moving in lockstep
+    return random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** attempt))
+
+
+async def chat_completion(
+    messages: list[dict],
+    model: str = DEFAULT_MODEL,
+    timeout: float | None = None,
+    on_delta: Callable[[str], Awaitable[None]] | None = None,
+    base_url: str | None = None,
+    api_key: str | None = None,
+) -> str:
+    """Run a chat completion and return the assistant message text.
+
+    When `on_delta` is given the completion is streamed and `on_delta` is
+    awaited with each text delta as it arrives. A streamed call is only
+    retried if it failed before any text was emitted.
+    """
+    global _retries
+    client = get_client(base_url, api_key)
+    # The shared buckets track the OpenAI key; other endpoints aren't paced
+    limiter = get_rate_limiter() if base_url is None else None
+    estimate = estimate_tokens(messages)
+    emitted = False
+
+    async def emit(delta: str) -> None:
+        nonlocal emitted
+        emitted = True
+        await on_delta(delta)
+
+    attempt = 0
+    while True:
+        if limiter is not None:
+            await limiter.acquire(estimate)
+        started = time.monotonic()
+        try:
+            text, usage = await _complete(client, messages, model, timeout, emit if on_delta is not None else None)
+        except Exception as e:
+            LLM_ERRORS.inc(error=type(e).__name__)
+            if not isinstance(e, RETRYABLE_ERRORS) or emitted or attempt >= LLM_MAX_RETRIES:
+                raise
+            delay = retry_delay(e, attempt)
+            if isinstance(e, RateLimitError) and limiter is not None:
+                # Everyone sharing the key backs off, not just this caller
+                await limiter.pause(delay)
+            attempt += 1
+            _retries += 1
+            await asyncio.sleep(delay)
+            continue
+        LLM_LATENCY.observe(time.monotonic() - started, model=model)
+        if usage is not None:
+            PROMPT_TOKENS.inc(usage.prompt_tokens, model=model)
+            COMPLETION_TOKENS.inc(usage.completion_tokens, model=model)
+            if limiter is not None:
+                await limiter.adjust(usage.total_tokens - estimate)
+        return text
+
+
+async def _complete(client, messages, model, timeout, on_delta) -> tuple[str, CompletionUsage | None]:
+    """One completion attempt, returning the text and the reported token usage"""
+    if on_delta is None:
+        response = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            timeout=timeout if timeout is not None else NOT_GIVEN,
+        )
+        return response.choices[0].message.content, response.usage
+
+    stream = await client.chat.completions.create(
+        model=model,
+        messages=messages,
+        stream=True,
+        stream_options={"include_usage": True},
+        timeout=timeout if timeout is not None else NOT_GIVEN,
+    )
+    pieces = []
+    usage = None
+    async with stream:
+        async for chunk in stream:
+            if chunk.usage:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                pieces.append(delta)
+                await on_delta(delta)
+    return "".join(pieces), usage
+
+
+def llm_stats() -> dict:
+    """Retry and rate limiter counters for this process"""
+    return {"retries": _retries, **get_rate_limiter().stats()}
+
+
+async def close_client() -> None:
+    """Close the pooled HTTP connections (call on server shutdown)"""
+    while _clients:
+        _, client = _clients.popitem()
+        await client.close()
@@ -0,0 +1,225 @@
+"""
+Prometheus metrics for the agent servers.
+
+Every agent app (and the single-process host) serves `GET /metrics` in the
+Prometheus text format. Metrics are kept per process and labeled with the
+agent's name from its `AgentCard`: `MetricsMiddleware` marks each request
+with the agent it was routed to, so the LLM, Exa and cache metrics recorded
+while serving it are attributed to the right agent even when the host runs
+all six in one process.
+
+Request, latency, token and cache metrics are recorded as they happen; the
+counters the other modules already keep (admission, intent routing,
+single-flight, cancellation, deadlines, LLM retries, model tiers, tracing)
+are read at scrape time.
+"""
+
+import math
+from contextvars import ContextVar
+
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+_current_agent: ContextVar[str] = ContextVar("agent", default="unknown")
+_registry: list["_Metric"] = []
+
+
+def current_agent() -> str:
+    """Name of the agent serving the current request ("unknown" outside requests)"""
+    return _current_agent.get()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ("agent",)):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._values: dict[tuple, object] = {}
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if "agent" in self.label_names and "agent" not in labels:
+            labels["agent"] = current_agent()
+        return tuple(labels[name] for name in self.label_names)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, key)} {_number(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down."""
+
+    type = "gauge"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ("agent",), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            # Per-bucket counts (not cumulative), sum, count
+            entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[0][i] += 1
+                break
+        entry[1] += value
+        entry[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = _labels(self.label_names, key, f'le="{_number(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {count}")
+        return lines
+
+
+REQUESTS = Counter(
+    "a2a_requests_total", "Agent requests by outcome", ("agent", "outcome")
+)
+IN_FLIGHT = Gauge("a2a_requests_in_flight", "Agent requests being answered")
+REQUEST_LATENCY = Histogram(
+    "a2a_request_duration_seconds", "End-to-end time to answer an agent request"
+)
+TIME_TO_FIRST_TOKEN = Histogram(
+    "a2a_time_to_first_token_seconds", "Time from request start to the first streamed text"
+)
+LLM_LATENCY = Histogram(
+    "llm_request_duration_seconds", "Latency of successful OpenAI chat completions", ("agent", "model")
+)
+LLM_ERRORS = Counter("llm_errors_total", "Failed OpenAI calls by error type", ("agent", "error"))
+PROMPT_TOKENS = Counter("llm_prompt_tokens_total", "Prompt tokens used", ("agent", "model"))
+COMPLETION_TOKENS = Counter("llm_completion_tokens_total", "Completion tokens used", ("agent", "model"))
+EXA_LATENCY = Histogram("exa_request_duration_seconds", "Exa search latency")
+EXA_ERRORS = Counter("exa_errors_total", "Failed Exa searches by error type", ("agent", "error"))
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total", "Cache lookups by cache and result (hit/miss)", ("agent", "cache", "result")
+)
+
+
+def _stats_lines(name: str, help: str, stats: dict, label: str | None = None) -> list[str]:
+    """Render a `*_stats()` dict (optionally keyed by `label`) as gauges"""
+    groups = stats.items() if label is not None else [(None, stats)]
+    series: dict[str, list[str]] = {}
+    for group, values in groups:
+        for key, value in values.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            labels = _labels((label,), (group,)) if label is not None else ""
+            series.setdefault(key, []).append(f"{name}_{key}{labels} {_number(value)}")
+    lines = []
+    for key, samples in series.items():
+        lines += [f"# HELP {name}_{key} {help}: {key}", f"# TYPE {name}_{key} gauge", *samples]
+    return lines
+
+
+def render() -> str:
+    """All metrics of this process in the Prometheus text format"""
+    # Imported here so every module can record metrics without import cycles
+    from admission import admission_stats
+    from deadline import deadline_stats
+    from intent_router import router_stats
+    from llm_client import llm_stats
+    from model_router import model_router_stats
+    from response_cache import get_response_cache
+    from single_flight import single_flight_stats
+    from streaming import cancel_stats
+    from tracing import tracing_stats
+
+    lines = []
+    for metric in _registry:
+        lines += metric.render()
+    lines += _stats_lines("admission", "Admission control", admission_stats(), label="controller")
+    lines += _stats_lines("intent_router", "Intent routing", router_stats(), label="router")
+    lines += _stats_lines("single_flight", "Coalesced calls", single_flight_stats(), label="group")
+    lines += _stats_lines("cancel", "Task cancellation", cancel_stats())
+    lines += _stats_lines("deadline", "Deadline budgets", deadline_stats())
+    lines += _stats_lines("llm", "LLM retries and rate limiting", llm_stats())
+    lines += _stats_lines("model_router", "Model tier routing", model_router_stats())
+    lines += _stats_lines("response_cache", "Response cache", get_response_cache().stats())
+    lines += _stats_lines("tracing", "Trace sampling and export", tracing_stats())
+    return "\n".join(lines) + "\n"
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    return Response(render(), media_type=CONTENT_TYPE)
+
+
+class MetricsMiddleware:
+    """ASGI middleware attributing everything recorded during a request to `agent`."""
+
+    def __init__(self, app: ASGIApp, agent: str):
+        self.app = app
+        self.agent = agent
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        token = _current_agent.set(self.agent)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_agent.reset(token)
+
+
+def add_metrics(app, agent: str) -> None:
+    """Serve `/metrics` on an agent app and label its requests with `agent`"""
+    app.add_route("/metrics", metrics_endpoint, methods=["GET"])
+    app.add_middleware(MetricsMiddleware, agent=agent)
@@ -0,0 +1,115 @@
+"""
+Latency-tiered model routing for the agents.
+
+Each LLM call names the agent making it and the answer length it expects.
+`choose_tier` sends it to the fast tier (a smaller model) when the answer
+is short and the prompt small, or when the request's remaining deadline is
+too short for the standard model to write the answer; everything else goes
+to the standard tier. `tiered_completion` escalates a fast-tier call to the
+standard tier if it fails before producing any text.
+
+Tiers are configured with `LLM_<TIER>_MODEL` and may point at any
+OpenAI-compatible endpoint with `LLM_<TIER>_BASE_URL` (e.g. a local model
+server). `<AGENT_ID>_MODEL_TIER=fast|standard` pins an agent to one tier.
+"""
+
+import os
+from dataclasses import dataclass
+
+from deadline import current_deadline
+from llm_client import DEFAULT_MODEL, chat_completion
+from rate_limit import estimate_tokens
+from single_flight import OnDelta
+
+# Calls this small go to the fast tier
+LLM_FAST_MAX_OUTPUT_TOKENS = int(os.getenv("LLM_FAST_MAX_OUTPUT_TOKENS", "150"))
+LLM_FAST_MAX_INPUT_TOKENS = int(os.getenv("LLM_FAST_MAX_INPUT_TOKENS", "2000"))
+# Standard tier speed, used to tell whether it can answer within the deadline
+LLM_STANDARD_TOKENS_PER_SECOND = float(os.getenv("LLM_STANDARD_TOKENS_PER_SECOND", "60"))
+LLM_STANDARD_FIRST_TOKEN_SECONDS = float(os.getenv("LLM_STANDARD_FIRST_TOKEN_SECONDS", "1.0"))
+
+
+@dataclass(frozen=True)
+class Tier:
+    """A model and the endpoint serving it (None: the default OpenAI endpoint)."""
+
+    name: str
+    model: str
+    base_url: str | None = None
+    api_key: str | None = None
+
+    @classmethod
+    def from_env(cls, name: str, default_model: str) -> "Tier":
+        prefix = f"LLM_{name.upper()}"
+        return cls(
+            name=name,
+            model=os.getenv(f"{prefix}_MODEL", default_model),
+            base_url=os.getenv(f"{prefix}_BASE_URL") or None,
+            api_key=os.getenv(f"{prefix}_API_KEY") or None,
+        )
+
+
+TIERS = {
+    "fast": Tier.from_env("fast", "gpt-4o-mini"),
+    "standard": Tier.from_env("standard", DEFAULT_MODEL),
+}
+
+_routed = {name: 0 for name in TIERS}
+_escalations = 0
+
+
+def choose_tier(agent_id: str, messages: list[dict], output_tokens: int) -> Tier:
+    """Pick the tier for a call by `agent_id` expected to write about `output_tokens` tokens"""
+    pinned = os.getenv(f"{agent_id.upper()}_MODEL_TIER", "").lower()
+    if pinned in TIERS:
+        name = pinned
+    elif (
+        output_tokens <= LLM_FAST_MAX_OUTPUT_TOKENS
+        and estimate_tokens(messages, output_tokens=0) <= LLM_FAST_MAX_INPUT_TOKENS
+    ):
+        name = "fast"
+    elif (
+        current_deadline().remaining()
+        < LLM_STANDARD_FIRST_TOKEN_SECONDS + output_tokens / LLM_STANDARD_TOKENS_PER_SECOND
+    ):
+        # Not enough budget left for the standard model to finish
+        name = "fast"
+    else:
+        name = "standard"
+    _routed[name] += 1
+    return TIERS[name]
+
+
+async def tiered_completion(tier: Tier, messages: list[dict], on_delta: OnDelta | None = None) -> str:
+    """Run a chat completion on `tier`, escalating to the standard tier if it fails before any text"""
+    global _escalations
+    emitted = False
+
+    async def emit(delta: str) -> None:
+        nonlocal emitted
+        emitted = True
+        await on_delta(delta)
+
+    try:
+        text = await chat_completion(
+            messages,
+            model=tier.model,
+            on_delta=emit if on_delta is not None else None,
+            base_url=tier.base_url,
+            api_key=tier.api_key,
+        )
+        if text or tier.name == "standard":
+            return text
+    except Exception as e:
+        if emitted or tier.name == "standard":
+            raise
+        print(f"⚠️  {tier.model} failed ({e!r}), escalating to {TIERS['standard'].model}")
+    _escalations += 1
+    standard = TIERS["standard"]
+    return await chat_completion(
+        messages, model=standard.model, on_delta=on_delta, base_url=standard.base_url, api_key=standard.api_key
+    )
+
+
+def model_router_stats() -> dict:
+    return {**{f"routed_{name}": count for name, count in _routed.items()}, "escalations": _escalations}
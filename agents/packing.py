@@ -1,102 +1,160 @@
+import json
+import os
+import re
 import uvicorn
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+from a2a.server.agent_execution import RequestContext
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
+from a2a.server.tasks import TaskStore
 from a2a.types import (
     AgentCapabilities,
     AgentCard,
     AgentSkill,
 )
-from a2a.server.agent_execution import AgentExecutor, RequestContext
-from a2a.server.events import EventQueue
-from a2a.utils import new_agent_text_message
 from a2a.types import (
-    Message
+    DataPart,
+    Message,
+    TextPart,
 )
-import openai
-import weave
-
-# Initialize Weave (optional)
-try:
-    weave.init('a2a-packing-agent')
-    print("✅ Weave initialized for packing agent")
-    weave_op = weave.op
-except Exception as e:
-    print(f"⚠️  Weave initialization failed: {e}")
-    print("Agent will run without Weave tracing")
-    # Create a no-op decorator when weave is not available
-    def weave_op(func):
-        return func
+from admission import AdmissionMiddleware
+from deadline import agent_deadline, current_deadline, within_deadline
+from intent_router import COMMON_INTENTS, Intent, card_reply, get_intent_router
+from metrics import add_metrics
+from model_router import choose_tier, tiered_completion
+from packing_state import DEFAULT_ITEMS, ItemCatalog, PackingSession, SessionStore
+from single_flight import flight_key, get_single_flight
+from specialists import Specialist, close_http_client, fan_out
+from streaming import StreamingAgentExecutor
+from task_store import create_task_store
+from tracing import start_tracing, traced
+
+# "packed Passport, Phone; unpacked Camera" -> one clause per action
+UPDATE_CLAUSE = re.compile(r"\b(unpacked|packed)\b\s+([^;\n]+)", re.IGNORECASE)
+PACKING_ORCHESTRATION = os.getenv("PACKING_ORCHESTRATION", "1").lower() not in ("0", "false", "off", "no")
+
+# An explicit ask for a whole plan: a verb followed within a few words by
+# list/plan/strategy ("Create a complete packing list for ..."), but not
+# "make sure" or a question about the current state
+PLAN_REQUEST = (
+    r"\b(?:create|make(?!\s+sure)|build|generate|draw up|put together|plan)\b"
+    r"(?:\s+[\w'-]+){0,4}?\s+(?:list|plan|strategy)\b"
+)
+
+# In priority order. Plan requests consult the specialists; everything else
+# routed here is local.
+PACKING_INTENTS = [
+    Intent("update", r"update_packing_state|mark_packed"),
+    *COMMON_INTENTS,
+    *([Intent("plan", PLAN_REQUEST, local=False)] if PACKING_ORCHESTRATION else []),
+    Intent("tip", r"\b(?:tips?|what next|what should i pack next)\b"),
+    Intent("checklist", r"\b(?:checklist|what'?s left|what is left|remaining|still need)\b"),
+    Intent("status", r"packing|packed|items|progress|status"),
+]
+
+
+def _message_text(message: Message) -> str:
+    """Join the text parts of a message"""
+    return " ".join(part.root.text for part in message.parts if isinstance(part.root, TextPart))
+
+
+def _message_data(message: Message) -> dict | None:
+    """Merge the DataParts of a message, or None if it has none"""
+    data = None
+    for part in message.parts:
+        if isinstance(part.root, DataPart):
+            data = {**(data or {}), **part.root.data}
+    return data
+
+
+def _data_updates(data: dict) -> list[tuple[str, bool]]:
+    """Read batch updates from data like {"updates": [{"item": "Passport", "packed": true}]}
+
+    Raises ValueError if any `packed` is not a JSON boolean ("false" must not mean packed).
+    """
+    updates = data.get("updates")
+    if not isinstance(updates, list):
+        return []
+    parsed = []
+    for update in updates:
+        if not isinstance(update, dict) or "item" not in update:
+            continue
+        packed = update.get("packed", True)
+        if not isinstance(packed, bool):
+            raise ValueError(f'"packed" must be true or false for {update["item"]}, got {packed!r}')
+        parsed.append((str(update["item"]), packed))
+    return parsed
+
+
+def _text_updates(message: str) -> list[tuple[str, bool]]:
+    """Parse "update_packing_state: packed A, B; unpacked C" (one or many lines) into updates"""
+    updates = []
+    text = message.replace("mark_packed", "packed").replace("update_packing_state:", "\n")
+    for match in UPDATE_CLAUSE.finditer(text):
+        packed = match.group(1).lower() == "packed"
+        for item_name in match.group(2).split(","):
+            if item_name.strip():
+                updates.append((item_name.strip(), packed))
+    return updates
+
 
 class PackingAgent:
     """Master Packing Agent that coordinates and synthesizes all packing recommendations."""
 
     def __init__(self):
-        # Initialize with default items matching frontend structure
-        self.default_items = [
-            {"id": "passport", "name": "Passport", "category": "essentials", "priority": "essential", "packed": False},
-            {"id": "phone", "name": "Phone", "category": "essentials", "priority": "essential", "packed": False},
-            {"id": "wallet", "name": "Wallet", "category": "essentials", "priority": "essential", "packed": False},
-            {"id": "tshirts", "name": "T-Shirts", "category": "clothing", "priority": "essential", "packed": False},
-            {"id": "pants", "name": "Pants", "category": "clothing", "priority": "essential", "packed": False},
-            {"id": "underwear", "name": "Underwear", "category": "clothing", "priority": "essential", "packed": False},
-            {"id": "toothbrush", "name": "Toothbrush", "category": "toiletries", "priority": "recommended", "packed": False},
-            {"id": "shampoo", "name": "Shampoo", "category": "toiletries", "priority": "recommended", "packed": False},
-            {"id": "deodorant", "name": "Deodorant", "category": "toiletries", "priority": "recommended", "packed": False},
-            {"id": "charger", "name": "Charger", "category": "electronics", "priority": "essential", "packed": False},
-            {"id": "camera", "name": "Camera", "category": "electronics", "priority": "recommended", "packed": False},
-            {"id": "headphones", "name": "Headphones", "category": "electronics", "priority": "optional", "packed": False},
-        ]
-
-        self.packing_state = {
-            "items": self.default_items.copy(),
-            "categories": self._calculate_categories(self.default_items),
-            "progress": 0,
-            "totalPacked": 0,
-            "totalItems": len(self.default_items)
-        }
-
-    def _calculate_categories(self, items):
-        """Calculate category statistics from items list"""
-        categories = {}
-        for item in items:
-            category = item["category"]
-            if category not in categories:
-                categories[category] = {"packed": 0, "total": 0, "priority": "medium"}
-
-            categories[category]["total"] += 1
-            if item["packed"]:
-                categories[category]["packed"] += 1
-
-        return categories
-
-    @weave_op
-    async def invoke(self, message: Message) -> str:
-        user_message = message.parts[0].root.text
-
-        # Check if this is a packing state update request
-        if "update_packing_state" in user_message.lower() or "mark_packed" in user_message.lower():
-            return self._handle_packing_update(user_message)
-
-        # Check if user is asking about packing status
-        if any(keyword in user_message.lower() for keyword in ["packing", "packed", "items", "progress", "status"]):
-            return self._get_packing_status()
+        # One immutable item catalog shared by every session
+        self.catalog = ItemCatalog(DEFAULT_ITEMS)
+        self.sessions = SessionStore(self.catalog)
+
+    @traced('packing_agent')
+    async def invoke(self, message: Message, on_delta=None) -> str:
+        session = self.sessions.get(message.contextId)
+
+        user_message = _message_text(message)
+
+        # Structured requests (batch updates, bare state sync) arrive as a DataPart
+        data = _message_data(message)
+        # A new session (first contact, restart or eviction) starts from the client's packed items
+        if data is not None and isinstance(data.get("packed"), list):
+            session.seed(str(item_id) for item_id in data["packed"])
+        if data is not None and ("updates" in data or not user_message.strip()):
+            try:
+                updates = _data_updates(data)
+            except ValueError as e:
+                return f"⚠️ {e}. No changes applied.\n\n{self._get_packing_status(session)}"
+            return self._apply_updates(session, updates)
+
+        # Full plans fan out to the specialists (also on request with {"orchestrate": true})
+        if PACKING_ORCHESTRATION and (data or {}).get("orchestrate"):
+            return await self._plan(session, user_message, on_delta)
+
+        # One pass over the message picks the intent; only open-ended asks reach the LLM
+        intent = get_intent_router('packing_agent', PACKING_INTENTS).match(user_message)
+        if intent is not None:
+            if intent.name == "update":
+                return self._handle_packing_update(session, user_message)
+            if intent.name == "plan":
+                return await self._plan(session, user_message, on_delta)
+            if intent.name == "tip":
+                return self._get_packing_tip(session)
+            if intent.name == "checklist":
+                return self._get_checklist(session)
+            if intent.name == "status":
+                return self._get_packing_status(session)
+            return card_reply(public_agent_card, intent)
 
         # Generate packing recommendations and initialize state if needed
-        response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": f"""You are a travel packing expert. Give EXTREMELY SHORT responses (1-2 sentences max).
+        messages = [
+            {"role": "system", "content": f"""You are a travel packing expert. Give EXTREMELY SHORT responses (1-2 sentences max).
 
 Current packing state:
-- Total items: {self.packing_state['totalItems']}
-- Packed items: {self.packing_state['totalPacked']}
-- Progress: {self.packing_state['progress']}%
+- Total items: {session.total_items}
+- Packed items: {session.total_packed}
+- Progress: {session.progress}%
 
 Be concise and direct. No long lists or detailed explanations. Focus on the most important 2-3 items only.
 
@@ -106,79 +164,139 @@ Examples of good responses:
 - "Priority: passport and phone. Check weather for clothing."
 
 Never write more than 25 words total."""},
-                {"role": "user", "content": user_message}
-            ]
-        )
+            {"role": "user", "content": user_message}
+        ]
 
-        recommendations = response.choices[0].message.content
+        # Identical concurrent asks against the same state share one completion;
+        # past the deadline we answer with a quick tip instead. Answers are
+        # capped at 25 words, so this normally runs on the fast tier.
+        tier = choose_tier('packing_agent', messages, output_tokens=60)
+        recommendations = await within_deadline(
+            lambda on_delta: get_single_flight('packing_agent').do(
+                flight_key(json.dumps(messages)),
+                lambda on_delta: tiered_completion(tier, messages, on_delta=on_delta),
+                on_delta,
+            ),
+            current_deadline().remaining(),
+            lambda: self._get_packing_tip(session),
+            on_delta,
+        )
 
         # Parse response for any packing commands
         if "mark" in recommendations.lower() and "packed" in recommendations.lower():
-            self._parse_recommendations_for_updates(recommendations)
+            self._parse_recommendations_for_updates(session, recommendations)
 
         return recommendations
 
-    def _handle_packing_update(self, message: str) -> str:
-        """Handle requests to update packing state"""
-        # Parse update commands like "update_packing_state: packed Passport"
-        if "packed" in message.lower() or "unpacked" in message.lower():
-            parts = message.split()
-            if len(parts) >= 3:
-                action = parts[1]  # "packed" or "unpacked"
-                item_name = " ".join(parts[2:])  # rest is item name
+    async def _plan(self, session: PackingSession, user_message: str, on_delta=None) -> str:
+        """Consult the specialists concurrently, streaming each answer, then synthesize one plan"""
+        pieces: list[str] = []
+
+        async def publish(text: str) -> None:
+            pieces.append(text)
+            if on_delta is not None:
+                await on_delta(text)
 
-                # Find and update the item in our state
-                was_updated = self._update_item_status(item_name, action == "packed")
+        async def on_answer(specialist: Specialist, answer: str | None) -> None:
+            if answer:
+                await publish(f"### {specialist.name}\n{answer.strip()}\n\n")
 
-                if was_updated:
-                    status = self._get_packing_status()
-                    # Add explicit state update command for frontend parsing
-                    return f"update_packing_state: {action} {item_name}\n\n{status}"
+        deadline = current_deadline()
+        answers = await fan_out(user_message, deadline, on_answer)
+        if not answers:
+            await publish(f"⚠️ The specialist agents are unavailable right now. {self._get_packing_tip(session)}")
+            return "".join(pieces)
 
-        return self._get_packing_status()
+        recommendations = "\n\n".join(f"{name} expert:\n{answer}" for name, answer in answers.items())
+        messages = [
+            {"role": "system", "content": f"""You are a master travel packing coordinator. Merge the specialist recommendations below into one organized packing plan.
 
-    def _update_item_status(self, item_name: str, packed: bool):
+Group items by bag (carry-on, checked) and category, remove duplicates, resolve conflicts, and keep quantities. The traveler has already packed {session.total_packed} of {session.total_items} checklist items ({session.progress}%).
+
+Be concise: at most 150 words."""},
+            {"role": "user", "content": f"Request: {user_message}\n\n{recommendations}"},
+        ]
+        await publish("### Packing plan\n")
+        tier = choose_tier('packing_agent', messages, output_tokens=300)
+        await within_deadline(
+            lambda on_delta: tiered_completion(tier, messages, on_delta=on_delta),
+            deadline.remaining(),
+            lambda: self._get_packing_tip(session),
+            publish,
+        )
+        return "".join(pieces)
+
+    def _handle_packing_update(self, session: PackingSession, message: str) -> str:
+        """Handle requests to update packing state"""
+        # Parse update commands like "update_packing_state: packed Passport, Phone; unpacked Camera"
+        return self._apply_updates(session, _text_updates(message))
+
+    def _apply_updates(self, session: PackingSession, updates: list[tuple[str, bool]]) -> str:
+        """Apply a batch of (item name, packed) updates all-or-nothing and report the changes"""
+        changes: dict[int, bool] = {}
+        unknown = []
+        for item_name, packed in updates:
+            index = self.catalog.find(item_name)
+            if index is None:
+                unknown.append(item_name)
+            else:
+                changes[index] = packed
+
+        status = self._get_packing_status(session)
+        if unknown:
+            return f"⚠️ Unknown items: {', '.join(unknown)}. No changes applied.\n\n{status}"
+
+        changed = session.apply(changes)
+        if not changed:
+            return status
+
+        status = self._get_packing_status(session)
+        # One explicit state update command per changed item for frontend parsing
+        lines = [
+            f"update_packing_state: {'packed' if changes[index] else 'unpacked'} {self.catalog.items[index].name}"
+            for index in changed
+        ]
+        return "\n".join(lines) + f"\n\n{status}"
+
+    def _update_item_status(self, session: PackingSession, item_name: str, packed: bool):
         """Update the packed status of an item"""
-        item_name_lower = item_name.lower()
-        item_updated = False
-
-        # Find the item by name (fuzzy matching)
-        for item in self.packing_state["items"]:
-            item_dict_name = item["name"].lower()
-            if (item_dict_name == item_name_lower or
-                item_name_lower in item_dict_name or
-                item_dict_name in item_name_lower):
-
-                old_status = item["packed"]
-                item["packed"] = packed
-                if old_status != packed:
-                    item_updated = True
-                    print(f"✅ Updated {item['name']}: {old_status} -> {packed}")
-                break
+        # Find the item by name (indexed fuzzy matching)
+        index = self.catalog.find(item_name)
+        if index is None:
+            return False
 
+        item_updated = session.set_packed(index, packed)
         if item_updated:
-            # Recalculate totals
-            self.packing_state["totalPacked"] = sum(1 for item in self.packing_state["items"] if item["packed"])
-            self.packing_state["progress"] = int((self.packing_state["totalPacked"] / self.packing_state["totalItems"] * 100)) if self.packing_state["totalItems"] > 0 else 0
-            self.packing_state["categories"] = self._calculate_categories(self.packing_state["items"])
-
+            print(f"✅ Updated {self.catalog.items[index].name}: {not packed} -> {packed}")
         return item_updated
 
-    def _get_packing_status(self) -> str:
+    def _get_packing_status(self, session: PackingSession) -> str:
         """Return current packing status"""
-        packed_items = [item["name"] for item in self.packing_state["items"] if item["packed"]]
-        unpacked_items = [item["name"] for item in self.packing_state["items"] if not item["packed"]]
+        packed_items = [self.catalog.items[index].name for index in session.packed_indices(3)]
+        unpacked_items = [self.catalog.items[index].name for index in session.unpacked_indices(3)]
 
-        status = f"""📦 {self.packing_state['progress']}% packed
+        status = f"""📦 {session.progress}% packed
 
-✅ Done: {', '.join(packed_items[:3]) if packed_items else 'None'}
-⚪ Next: {', '.join(unpacked_items[:3]) if unpacked_items else 'All set!'}"""
+✅ Done: {', '.join(packed_items) if packed_items else 'None'}
+⚪ Next: {', '.join(unpacked_items) if unpacked_items else 'All set!'}"""
 
         return status
 
-    def _get_packing_tip(self) -> str:
+    def _get_checklist(self, session: PackingSession) -> str:
+        """List every item still to pack, by category"""
+        remaining: dict[str, list[str]] = {}
+        for index in session.unpacked_indices(session.total_items):
+            item = self.catalog.items[index]
+            remaining.setdefault(item.category, []).append(item.name)
+        if not remaining:
+            return "🎉 Everything is packed!"
+        lines = [f"📋 Still to pack ({session.total_items - session.total_packed} items):"]
+        lines += [f"- {category.title()}: {', '.join(names)}" for category, names in remaining.items()]
+        return "\n".join(lines)
+
+    def _get_packing_tip(self, session: PackingSession) -> str:
         """Get a relevant packing tip based on current progress"""
-        progress = self.packing_state['progress']
+        progress = session.progress
         if progress == 0:
             return "Start with essentials like passport, phone, and wallet!"
         elif progress < 50:
@@ -188,7 +306,7 @@ Never write more than 25 words total."""},
         else:
             return "Almost done! Double-check your essentials and documents."
 
-    def _parse_recommendations_for_updates(self, recommendations: str):
+    def _parse_recommendations_for_updates(self, session: PackingSession, recommendations: str):
         """Parse recommendations text for packing update commands"""
         lines = recommendations.lower().split('\n')
         for line in lines:
@@ -199,13 +317,28 @@ Never write more than 25 words total."""},
                     end = line.find('packed')
                     if start < end:
                         item_name = line[start:end].strip()
-                        self._update_item_status(item_name, True)
+                        self._update_item_status(session, item_name, True)
                 except:
                     continue
 
-    def get_state_for_frontend(self):
+    def get_state_for_frontend(self, context_id: str):
         """Get state in format expected by frontend"""
-        return self.packing_state
+        return self.sessions.get(context_id).to_state()
+
+    def state_update(self, message: Message) -> dict | None:
+        """Snapshot on first contact, then patches with the changes since the last reply.
+
+        A client that lost track can send a DataPart with {"snapshot": true}, or
+        {"stateVersion": n} with the last version it applied; a mismatch with
+        the version we last sent triggers a fresh snapshot. Clients also send
+        {"packed": [item ids]} so a new session starts from their state.
+        """
+        session = self.sessions.get(message.contextId)
+        data = _message_data(message) or {}
+        snapshot = bool(data.get("snapshot")) or (
+            "stateVersion" in data and data["stateVersion"] != session.synced_version
+        )
+        return session.sync(snapshot=snapshot)
 
 skill = AgentSkill(
     id='packing_agent',
@@ -232,43 +365,53 @@ public_agent_card = AgentCard(
 )
 
 
-class PackingAgentExecutor(AgentExecutor):
+class PackingAgentExecutor(StreamingAgentExecutor):
     """Packing Agent Implementation."""
 
+    deadline = agent_deadline('packing_agent')
+
     def __init__(self):
         self.agent = PackingAgent()
 
-    async def execute(
-        self,
-        context: RequestContext,
-        event_queue: EventQueue,
-    ) -> None:
-        result = await self.agent.invoke(context.message)
-        await event_queue.enqueue_event(new_agent_text_message(result))
+    def get_packing_state(self, context_id: str):
+        """Get current packing state for frontend"""
+        return self.agent.get_state_for_frontend(context_id)
 
-    async def cancel(
-        self, context: RequestContext, event_queue: EventQueue
-    ) -> None:
-        raise Exception('cancel not supported')
+    def state_update(self, context: RequestContext) -> dict | None:
+        """Publish packing state snapshots/patches as a "state" artifact"""
+        return self.agent.state_update(context.message)
 
-    def get_packing_state(self):
-        """Get current packing state for frontend"""
-        return self.agent.packing_state
 
+def build_app(url: str | None = None, task_store: TaskStore | None = None):
+    """Build the Starlette app serving this agent"""
+    agent_card = public_agent_card
+    if url is not None:
+        agent_card = public_agent_card.model_copy(update={'url': url})
+    if task_store is None:
+        task_store = create_task_store('packing_agent')
 
-def main():
     request_handler = DefaultRequestHandler(
         agent_executor=PackingAgentExecutor(),
-        task_store=InMemoryTaskStore(),
+        task_store=task_store,
     )
 
     server = A2AStarletteApplication(
-        agent_card=public_agent_card,
+        agent_card=agent_card,
         http_handler=request_handler,
-        extended_agent_card=public_agent_card,
+        extended_agent_card=agent_card,
+    )
+    # Weave is set up in the background once the server starts, never before it listens
+    app = server.build(
+        on_startup=[lambda: start_tracing('a2a-packing-agent')],
+        on_shutdown=[close_http_client, task_store.close],
     )
+    app.add_middleware(AdmissionMiddleware, name='packing_agent')
+    add_metrics(app, agent_card.name)
+    return app
 
-    uvicorn.run(server.build(), host='0.0.0.0', port=9994)
+
+def main():
+    uvicorn.run(build_app(), host='0.0.0.0', port=9994)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,346 @@
+"""
+Per-session packing state for the packing agent.
+
+All sessions share one immutable `ItemCatalog`; a session only stores which
+catalog items are packed, as a bitset, plus when it was last used. Sessions
+are keyed by the A2A context id and evicted when idle or when the store is
+over its size cap, so one process can track thousands of trips.
+
+The catalog indexes item names (exact, token and trigram) so updates resolve
+an item without scanning the list, and sessions keep their packed totals and
+per-category counts up to date incrementally as items flip.
+
+Each session also versions its state for the structured sync protocol: the
+first `sync()` of a context returns a full snapshot, later ones a JSON
+Patch-style list of `replace` operations covering only what changed since the
+previous sync.
+"""
+
+import os
+import re
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Iterable
+
+PACKING_MAX_SESSIONS = int(os.getenv("PACKING_MAX_SESSIONS", "10000"))
+PACKING_SESSION_TTL = float(os.getenv("PACKING_SESSION_TTL", "86400"))
+# Minimum trigram similarity for a fuzzy name match without shared words
+FUZZY_MIN_SIMILARITY = 0.5
+# Trigram similarity (spaces ignored) at which a match counts as a respelling of the name
+FUZZY_NEAR_EXACT_SIMILARITY = 0.9
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Default items matching the frontend structure
+DEFAULT_ITEMS = [
+    {"id": "passport", "name": "Passport", "category": "essentials", "priority": "essential"},
+    {"id": "phone", "name": "Phone", "category": "essentials", "priority": "essential"},
+    {"id": "wallet", "name": "Wallet", "category": "essentials", "priority": "essential"},
+    {"id": "tshirts", "name": "T-Shirts", "category": "clothing", "priority": "essential"},
+    {"id": "pants", "name": "Pants", "category": "clothing", "priority": "essential"},
+    {"id": "underwear", "name": "Underwear", "category": "clothing", "priority": "essential"},
+    {"id": "toothbrush", "name": "Toothbrush", "category": "toiletries", "priority": "recommended"},
+    {"id": "shampoo", "name": "Shampoo", "category": "toiletries", "priority": "recommended"},
+    {"id": "deodorant", "name": "Deodorant", "category": "toiletries", "priority": "recommended"},
+    {"id": "charger", "name": "Charger", "category": "electronics", "priority": "essential"},
+    {"id": "camera", "name": "Camera", "category": "electronics", "priority": "recommended"},
+    {"id": "headphones", "name": "Headphones", "category": "electronics", "priority": "optional"},
+]
+
+
+@dataclass(frozen=True)
+class PackingItem:
+    id: str
+    name: str
+    category: str
+    priority: str
+
+
+def _normalize(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+def _trigrams(name: str) -> set[str]:
+    compact = "".join(_TOKEN.findall(name))
+    return {compact[i:i + 3] for i in range(len(compact) - 2)}
+
+
+class ItemCatalog:
+    """Immutable list of packable items shared by every session."""
+
+    def __init__(self, items: Iterable[dict]):
+        self.items = tuple(
+            PackingItem(item["id"], item["name"], item["category"], item["priority"])
+            for item in items
+        )
+        # Categories in order of first appearance, with each item's category index
+        self.categories: list[str] = []
+        self.category_of: list[int] = []
+        self.category_totals: list[int] = []
+        category_index: dict[str, int] = {}
+        for item in self.items:
+            if item.category not in category_index:
+                category_index[item.category] = len(self.categories)
+                self.categories.append(item.category)
+                self.category_totals.append(0)
+            self.category_of.append(category_index[item.category])
+            self.category_totals[category_index[item.category]] += 1
+
+        self._ids = {item.id: index for index, item in enumerate(self.items)}
+        # Name indexes: exact name/id, word tokens and character trigrams
+        self._names = [_normalize(item.name) for item in self.items]
+        self._exact: dict[str, int] = {}
+        self._tokens: dict[str, list[int]] = {}
+        self._grams: dict[str, list[int]] = {}
+        self._item_grams: list[set[str]] = []
+        for index, item in enumerate(self.items):
+            for key in (self._names[index], item.id.lower()):
+                self._exact.setdefault(key, index)
+            for token in set(_TOKEN.findall(self._names[index])):
+                self._tokens.setdefault(token, []).append(index)
+            grams = _trigrams(self._names[index])
+            self._item_grams.append(grams)
+            for gram in grams:
+                self._grams.setdefault(gram, []).append(index)
+
+    def find(self, name: str) -> int | None:
+        """Return the index of the item best matching `name`, or None.
+
+        Exact name/id matches win. Otherwise candidates sharing a word or a
+        trigram with `name` are ranked by near-exact similarity (so "head
+        phones" is Headphones, not Phone), then substring containment, shared
+        words and trigram similarity, with ties going to the earlier catalog item.
+        """
+        query = _normalize(name)
+        if not query:
+            return None
+        index = self._exact.get(query)
+        if index is not None:
+            return index
+
+        token_hits = Counter(
+            index for token in set(_TOKEN.findall(query)) for index in self._tokens.get(token, ())
+        )
+        query_grams = _trigrams(query)
+        gram_hits = Counter(
+            index for gram in query_grams for index in self._grams.get(gram, ())
+        )
+
+        best = None
+        best_score = None
+        for index in token_hits.keys() | gram_hits.keys():
+            item_name = self._names[index]
+            contains = query in item_name or item_name in query
+            union = len(query_grams) + len(self._item_grams[index]) - gram_hits[index]
+            similarity = gram_hits[index] / union if union else 0.0
+            if not (contains or token_hits[index] or similarity >= FUZZY_MIN_SIMILARITY):
+                continue
+            near_exact = similarity >= FUZZY_NEAR_EXACT_SIMILARITY
+            score = (near_exact, contains, token_hits[index], similarity, -index)
+            if best_score is None or score > best_score:
+                best, best_score = index, score
+        return best
+
+    def index_of(self, item_id: str) -> int | None:
+        """Return the index of the item with id `item_id`, or None"""
+        return self._ids.get(item_id)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class PackingSession:
+    """Packing progress of one trip: a packed bitset over the shared catalog.
+
+    Totals and per-category packed counts are maintained incrementally, so
+    flipping an item and reading progress are O(1).
+    """
+
+    __slots__ = (
+        "catalog",
+        "packed",
+        "total_packed",
+        "category_packed",
+        "version",
+        "synced_version",
+        "dirty",
+        "last_seen",
+    )
+
+    def __init__(self, catalog: ItemCatalog):
+        self.catalog = catalog
+        self.packed = 0
+        self.total_packed = 0
+        self.category_packed = [0] * len(catalog.categories)
+        # Bumped on every flip; `dirty` marks the items flipped since the last sync
+        self.version = 0
+        self.synced_version: int | None = None
+        self.dirty = 0
+        self.last_seen = time.monotonic()
+
+    def is_packed(self, index: int) -> bool:
+        return bool(self.packed >> index & 1)
+
+    def set_packed(self, index: int, packed: bool) -> bool:
+        """Set an item's packed flag, returning True if it changed"""
+        if self.is_packed(index) == packed:
+            return False
+        self.packed ^= 1 << index
+        self.dirty |= 1 << index
+        self.version += 1
+        delta = 1 if packed else -1
+        self.total_packed += delta
+        self.category_packed[self.catalog.category_of[index]] += delta
+        return True
+
+    def seed(self, item_ids: Iterable[str]) -> None:
+        """Start a session that has never synced from the items the client has packed
+
+        Ids the catalog doesn't know are ignored.
+        """
+        if self.synced_version is not None:
+            return
+        for item_id in item_ids:
+            index = self.catalog.index_of(item_id)
+            if index is not None:
+                self.set_packed(index, True)
+
+    def apply(self, changes: dict[int, bool]) -> list[int]:
+        """Set several packed flags at once, returning the indices that changed"""
+        return [index for index, packed in changes.items() if self.set_packed(index, packed)]
+
+    def packed_indices(self, limit: int) -> list[int]:
+        """Indices of the first `limit` packed items"""
+        return _lowest_bits(self.packed, limit)
+
+    def unpacked_indices(self, limit: int) -> list[int]:
+        """Indices of the first `limit` unpacked items"""
+        return _lowest_bits(~self.packed & ((1 << self.total_items) - 1), limit)
+
+    @property
+    def total_items(self) -> int:
+        return len(self.catalog)
+
+    @property
+    def progress(self) -> int:
+        return int(self.total_packed / self.total_items * 100) if self.total_items > 0 else 0
+
+    def categories(self) -> dict:
+        """Category statistics from the incremental counters"""
+        return {
+            category: {
+                "packed": self.category_packed[index],
+                "total": self.catalog.category_totals[index],
+                "priority": "medium",
+            }
+            for index, category in enumerate(self.catalog.categories)
+        }
+
+    def to_state(self) -> dict:
+        """Expand into the packing state format expected by the frontend"""
+        return {
+            "items": [
+                {
+                    "id": item.id,
+                    "name": item.name,
+                    "category": item.category,
+                    "priority": item.priority,
+                    "packed": self.is_packed(index),
+                }
+                for index, item in enumerate(self.catalog.items)
+            ],
+            "categories": self.categories(),
+            "progress": self.progress,
+            "totalPacked": self.total_packed,
+            "totalItems": self.total_items,
+        }
+
+    def sync(self, snapshot: bool = False) -> dict | None:
+        """Return the state changes since the last sync, or None if nothing changed.
+
+        The first sync (or `snapshot=True`) returns the full state; later ones
+        return a patch from `baseVersion` to `version`.
+        """
+        if snapshot or self.synced_version is None:
+            update = {"type": "snapshot", "version": self.version, "state": self.to_state()}
+        elif self.dirty:
+            update = {
+                "type": "patch",
+                "baseVersion": self.synced_version,
+                "version": self.version,
+                "patch": self._patch(),
+            }
+        else:
+            return None
+        self.synced_version = self.version
+        self.dirty = 0
+        return update
+
+    def _patch(self) -> list[dict]:
+        """JSON Patch replace operations for the items flipped since the last sync
+
+        Items are addressed by id (`/items/<id>/packed`), not by position, so a
+        client holding a different item list can't flip the wrong item.
+        """
+        patch = []
+        categories = set()
+        for index in _lowest_bits(self.dirty, self.total_items):
+            item_id = self.catalog.items[index].id.replace("~", "~0").replace("/", "~1")
+            patch.append({"op": "replace", "path": f"/items/{item_id}/packed", "value": self.is_packed(index)})
+            categories.add(self.catalog.category_of[index])
+        for category in sorted(categories):
+            name = self.catalog.categories[category].replace("~", "~0").replace("/", "~1")
+            patch.append({"op": "replace", "path": f"/categories/{name}/packed", "value": self.category_packed[category]})
+        patch.append({"op": "replace", "path": "/progress", "value": self.progress})
+        patch.append({"op": "replace", "path": "/totalPacked", "value": self.total_packed})
+        return patch
+
+
+def _lowest_bits(bits: int, limit: int) -> list[int]:
+    indices = []
+    while bits and len(indices) < limit:
+        lowest = bits & -bits
+        indices.append(lowest.bit_length() - 1)
+        bits ^= lowest
+    return indices
+
+
+class SessionStore:
+    """Packing sessions keyed by context id, with idle and size-based eviction."""
+
+    def __init__(
+        self,
+        catalog: ItemCatalog,
+        max_sessions: int = PACKING_MAX_SESSIONS,
+        idle_ttl: float = PACKING_SESSION_TTL,
+    ):
+        self.catalog = catalog
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.evictions = 0
+        self._sessions: OrderedDict[str, PackingSession] = OrderedDict()
+
+    def get(self, context_id: str) -> PackingSession:
+        """Return the session for `context_id`, starting a new one if needed"""
+        now = time.monotonic()
+        session = self._sessions.get(context_id)
+        if session is None or now - session.last_seen > self.idle_ttl:
+            session = PackingSession(self.catalog)
+            self._sessions[context_id] = session
+        session.last_seen = now
+        self._sessions.move_to_end(context_id)
+        self._evict(now)
+        return session
+
+    def _evict(self, now: float) -> None:
+        # Least recently used sessions sit at the front
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if len(self._sessions) <= self.max_sessions and now - oldest.last_seen <= self.idle_ttl:
+                break
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -0,0 +1,166 @@
+"""
+Client-side OpenAI rate limiting shared by every agent on this machine.
+
+`RateLimiter` keeps two token buckets, requests per minute and tokens per
+minute, and paces calls before the API would reject them. The bucket levels
+live in a small state file guarded by `flock`, so the agents of one process
+and the separate agent processes started by start_agents.py draw from the
+same budget for the shared API key. A 429 from the API pauses every caller
+until its `Retry-After` has passed. Token usage is estimated up front and
+corrected once the response reports what was actually used.
+
+Without `fcntl` (e.g. on Windows) the buckets are kept per process.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+LLM_RPM = float(os.getenv("LLM_RPM", "500"))
+LLM_TPM = float(os.getenv("LLM_TPM", "200000"))
+LLM_RATE_LIMIT_FILE = os.getenv("LLM_RATE_LIMIT_FILE", "")
+# Completion tokens assumed for a call until the response reports its usage
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "400"))
+
+CHARS_PER_TOKEN = 4
+TOKENS_PER_MESSAGE = 4
+
+
+def estimate_tokens(messages: list[dict], output_tokens: int = LLM_EXPECTED_OUTPUT_TOKENS) -> int:
+    """Rough token cost of a chat completion: prompt characters plus expected output"""
+    chars = sum(len(message.get("content") or "") for message in messages)
+    return chars // CHARS_PER_TOKEN + TOKENS_PER_MESSAGE * len(messages) + output_tokens
+
+
+def default_state_path() -> str:
+    """Per-key state file in the temp directory, so only callers sharing a key share buckets"""
+    identity = f"{os.getenv('OPENAI_BASE_URL', '')}|{os.getenv('OPENAI_API_KEY', '')}"
+    digest = hashlib.sha256(identity.encode()).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"a2a-llm-{digest}.bucket")
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute token buckets, shared through a file."""
+
+    def __init__(self, rpm: float = LLM_RPM, tpm: float = LLM_TPM, path: str | None = None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.path = path if fcntl is not None else None
+        self._state: dict = {}
+        self._lock = asyncio.Lock()
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.pauses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rpm > 0 or self.tpm > 0
+
+    async def acquire(self, tokens: int) -> float:
+        """Wait until one request and `tokens` tokens are available; return the time waited"""
+        if not self.enabled:
+            return 0.0
+        waited = 0.0
+        # One in-process caller at a time keeps the shared buckets first come, first served
+        async with self._lock:
+            while True:
+                delay = await self._update(lambda state, now: self._take(state, now, tokens))
+                if delay <= 0:
+                    break
+                waited += delay
+                await asyncio.sleep(delay)
+        if waited:
+            self.waits += 1
+            self.wait_seconds += waited
+        return waited
+
+    async def adjust(self, tokens: int) -> None:
+        """Charge (or refund, if negative) the difference between estimated and actual usage"""
+        if self.enabled and tokens:
+            await self._update(lambda state, now: state.__setitem__("tokens", state["tokens"] - tokens))
+
+    async def pause(self, seconds: float) -> None:
+        """Hold back every caller sharing these buckets, e.g. after a 429"""
+        if not self.enabled:
+            return
+        self.pauses += 1
+
+        def block(state: dict, now: float) -> None:
+            state["blocked_until"] = max(state["blocked_until"], now + seconds)
+
+        await self._update(block)
+
+    def _take(self, state: dict, now: float, tokens: int) -> float:
+        if now < state["blocked_until"]:
+            return state["blocked_until"] - now
+        # A call larger than the whole bucket waits for a full bucket instead of forever
+        tokens = min(tokens, self.tpm) if self.tpm > 0 else 0
+        request_delay = (1 - state["requests"]) * 60 / self.rpm if self.rpm > 0 else 0.0
+        token_delay = (tokens - state["tokens"]) * 60 / self.tpm if self.tpm > 0 else 0.0
+        delay = max(request_delay, token_delay)
+        if delay <= 0:
+            state["requests"] -= 1
+            state["tokens"] -= tokens
+        return delay
+
+    def _refill(self, state: dict, now: float) -> None:
+        elapsed = max(0.0, now - state["updated"])
+        state["requests"] = min(self.rpm, state["requests"] + elapsed * self.rpm / 60)
+        state["tokens"] = min(self.tpm, state["tokens"] + elapsed * self.tpm / 60)
+        state["updated"] = now
+
+    async def _update(self, change):
+        if self.path is None:
+            return self._apply(self._state, change)
+        return await asyncio.to_thread(self._update_file, change)
+
+    def _apply(self, state: dict, change):
+        now = time.time()
+        if not state:
+            state.update(requests=self.rpm, tokens=self.tpm, updated=now, blocked_until=0.0)
+        self._refill(state, now)
+        return change(state, now)
+
+    def _update_file(self, change):
+        with open(self.path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    state = {}
+                result = self._apply(state, change)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+                return result
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def stats(self) -> dict:
+        return {
+            "waits": self.waits,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "pauses": self.pauses,
+        }
+
+
+_limiter: RateLimiter | None = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide limiter, creating it on first use"""
+    global _limiter
+    if _limiter is None:
+        _limiter = RateLimiter(path=LLM_RATE_LIMIT_FILE or default_state_path())
+    return _limiter
@@ -0,0 +1,216 @@
+"""
+Response cache for the specialist agents.
+
+Answers are keyed on agent id + model + normalized user text. Lookups go
+through a bounded in-memory LRU with TTL first and, when `RESPONSE_CACHE_DB`
+is set, an on-disk SQLite tier that survives restarts. Both tiers implement
+`get(key)` / `set(key, value)`, so other backends can be plugged in; the
+blocking SQLite calls run in a worker thread, off the event loop.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from metrics import CACHE_LOOKUPS
+from single_flight import OnDelta, get_single_flight
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_DB = os.getenv("RESPONSE_CACHE_DB", "")
+# Expired rows are deleted from the SQLite tier on writes at most this often (seconds)
+RESPONSE_CACHE_PURGE_INTERVAL = float(os.getenv("RESPONSE_CACHE_PURGE_INTERVAL", "300"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize user text so trivially different phrasings share a cache entry"""
+    text = _WHITESPACE.sub(" ", text.lower()).strip()
+    return text.rstrip("?!. ")
+
+
+def cache_key(agent_id: str, text: str, model: str) -> str:
+    """Build the cache key for an agent answer"""
+    raw = f"{agent_id}\x00{model}\x00{normalize_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Bounded in-memory LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        """Store `value` for `ttl` seconds (default: the cache's TTL)"""
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """Persistent cache tier stored in a local SQLite database."""
+
+    def __init__(
+        self, path: str, ttl: float = RESPONSE_CACHE_TTL, purge_interval: float = RESPONSE_CACHE_PURGE_INTERVAL
+    ):
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._purge()
+        self._conn.commit()
+
+    def _purge(self) -> None:
+        now = time.time()
+        self._conn.execute("DELETE FROM response_cache WHERE expires_at < ?", (now,))
+        self._next_purge = now + self.purge_interval
+
+    def get_entry(self, key: str) -> tuple[str, float] | None:
+        """Return the value and its remaining TTL in seconds, or None if missing or expired"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        remaining = row[1] - time.time()
+        if remaining <= 0:
+            return None
+        return row[0], remaining
+
+    def get(self, key: str) -> str | None:
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl),
+            )
+            # Keep the file from growing with expired rows while the process runs
+            if time.time() >= self._next_purge:
+                self._purge()
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    """Two-tier answer cache with hit/miss counters."""
+
+    def __init__(self, memory=None, disk=None):
+        self.memory = memory if memory is not None else LRUCache()
+        self.disk = disk
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        disk = SQLiteCache(RESPONSE_CACHE_DB) if RESPONSE_CACHE_DB else None
+        return cls(LRUCache(), disk)
+
+    async def get(self, agent_id: str, text: str, model: str) -> str | None:
+        key = cache_key(agent_id, text, model)
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            entry = await asyncio.to_thread(self.disk.get_entry, key)
+            if entry is not None:
+                value, remaining = entry
+                self.disk_hits += 1
+                # Promoted with the row's remaining TTL, so it never outlives the disk entry
+                self.memory.set(key, value, ttl=remaining)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        CACHE_LOOKUPS.inc(cache="response", result="miss" if value is None else "hit")
+        return value
+
+    async def set(self, agent_id: str, text: str, model: str, value: str) -> None:
+        key = cache_key(agent_id, text, model)
+        self.memory.set(key, value)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value)
+
+    async def get_or_compute(
+        self,
+        agent_id: str,
+        text: str,
+        model: str,
+        compute: Callable[[OnDelta | None], Awaitable[str]],
+        on_delta: OnDelta | None = None,
+    ) -> str:
+        """Return the cached answer, or compute, store and return a fresh one.
+
+        Concurrent misses for the same key share a single `compute` call.
+        """
+        cached = await self.get(agent_id, text, model)
+        if cached is not None:
+            return cached
+
+        async def compute_and_store(publish: OnDelta) -> str:
+            value = await compute(publish)
+            if value:
+                await self.set(agent_id, text, model, value)
+            return value
+
+        key = cache_key(agent_id, text, model)
+        return await get_single_flight(agent_id).do(key, compute_and_store, on_delta)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self.memory),
+            "evictions": getattr(self.memory, "evictions", 0),
+        }
+
+
+_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache, creating it on first use"""
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache.from_env()
+    return _cache
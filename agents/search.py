@@ -1,3 +1,4 @@
+import asyncio
 import uvicorn
 import os
 from dotenv import load_dotenv
@@ -7,33 +8,35 @@ load_dotenv()
 
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
+from a2a.server.tasks import TaskStore
 from a2a.types import (
     AgentCapabilities,
     AgentCard,
     AgentSkill,
 )
-from a2a.server.agent_execution import AgentExecutor, RequestContext
-from a2a.server.events import EventQueue
-from a2a.utils import new_agent_text_message
 from a2a.types import (
     Message
 )
-import openai
-from exa_py import Exa
-import weave
-
-# Initialize Weave (optional)
-try:
-    weave.init('a2a-search-agent')
-    print("✅ Weave initialized for search agent")
-    weave_op = weave.op
-except Exception as e:
-    print(f"⚠️  Weave initialization failed: {e}")
-    print("Agent will run without Weave tracing")
-    # Create a no-op decorator when weave is not available
-    def weave_op(func):
-        return func
+from admission import AdmissionMiddleware
+from deadline import agent_deadline, current_deadline, record_degraded, within_deadline
+from intent_router import COMMON_INTENTS, card_reply, get_intent_router
+from metrics import add_metrics
+from model_router import choose_tier, tiered_completion
+from streaming import StreamingAgentExecutor
+from task_store import create_task_store
+from exa_search import ExaSearch, rewrite_query
+from response_cache import normalize_text
+from single_flight import flight_key, get_single_flight
+from tracing import start_tracing, traced
+
+# Share of the request budget the Exa lookup may use; synthesis gets the rest
+EXA_DEADLINE_SHARE = float(os.getenv("SEARCH_EXA_DEADLINE_SHARE", "0.4"))
+# Rewritten queries searched concurrently (1 searches the query as typed)
+SEARCH_SUB_QUERIES = int(os.getenv("SEARCH_SUB_QUERIES", "3"))
+# Synthesis starts once this many distinct results are in (results of rewrites count half),
+# using at most SEARCH_MAX_RESULTS
+SEARCH_MIN_RESULTS = int(os.getenv("SEARCH_MIN_RESULTS", "5"))
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "6"))
 
 class SearchAgent:
     """Search Agent using Exa."""
@@ -42,40 +45,81 @@ class SearchAgent:
         exa_api_key = os.getenv("EXA_API_KEY")
         if not exa_api_key:
             raise ValueError("EXA_API_KEY environment variable is required")
-        self.exa = Exa(api_key=exa_api_key)
+        self.search = ExaSearch(api_key=exa_api_key)
 
-    @weave_op
-    async def invoke(self, message: Message) -> str:
+    @traced('search_agent')
+    async def invoke(self, message: Message, on_delta=None) -> str:
         user_query = message.parts[0].root.text
+        # Greetings and "what can you do" are answered from the agent card
+        intent = get_intent_router('search_agent', COMMON_INTENTS).match(user_query)
+        if intent is not None:
+            return card_reply(public_agent_card, intent)
+        # Identical concurrent queries share one search + synthesis
+        return await get_single_flight('search_agent').do(
+            flight_key(normalize_text(user_query)),
+            lambda on_delta: self._answer(user_query, on_delta),
+            on_delta,
+        )
+
+    async def _answer(self, user_query: str, on_delta=None) -> str:
+        deadline = current_deadline()
+        pieces: list[str] = []
+
+        async def publish(text: str) -> None:
+            pieces.append(text)
+            if on_delta is not None:
+                await on_delta(text)
 
         try:
-            # Search using Exa
-            result = self.exa.search_and_contents(
-                user_query,
-                text=True,
-                num_results=3
-            )
+            # Search the rewritten queries concurrently using Exa, within its share of the budget
+            try:
+                results = await self.search.search_many(
+                    rewrite_query(user_query, SEARCH_SUB_QUERIES),
+                    deadline.share(EXA_DEADLINE_SHARE),
+                    SEARCH_MIN_RESULTS,
+                )
+            except asyncio.TimeoutError:
+                record_degraded()
+                return "Sorry, the web search took too long. Please try again in a moment."
+            results = results[:SEARCH_MAX_RESULTS]
+
+            # The sources go out before the synthesis starts, numbered as in the prompt
+            if results:
+                await publish(
+                    "Sources:\n"
+                    + "".join(f"{i}. {item.title} - {item.url}\n" for i, item in enumerate(results, 1))
+                )
 
             # Format the results
             search_results = []
-            for i, item in enumerate(result.results, 1):
-                search_results.append(f"{i}. {item.title}\n{item.url}\n{item.text[:200]}...")
+            for i, item in enumerate(results, 1):
+                search_results.append(f"{i}. {item.title}\n{item.url}\n{item.text}...")
 
             formatted_results = "\n\n".join(search_results)
 
-            # Use OpenAI to synthesize the search results
-            response = openai.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "You are a search agent. Based on the search results provided, give a helpful and concise answer to the user's query. Include relevant information from the search results."},
-                    {"role": "user", "content": f"Query: {user_query}\n\nSearch Results:\n{formatted_results}"}
-                ]
+            # Use OpenAI to synthesize the search results, falling back to the raw results;
+            # a concise answer over short snippets usually fits the fast tier
+            messages = [
+                {"role": "system", "content": "You are a search agent. Based on the search results provided, give a helpful and concise answer to the user's query. Include relevant information from the search results."},
+                {"role": "user", "content": f"Query: {user_query}\n\nSearch Results:\n{formatted_results}"}
+            ]
+            tier = choose_tier('search_agent', messages, output_tokens=150)
+            await publish("\n")
+            await within_deadline(
+                lambda on_delta: tiered_completion(tier, messages, on_delta=on_delta),
+                deadline.remaining(),
+                lambda: f"Here are the top results I found:\n\n{formatted_results}",
+                publish,
             )
-
-            return response.choices[0].message.content
+            return "".join(pieces)
 
         except Exception as e:
-            return f"Sorry, I encountered an error while searching: {str(e)}"
+            error = f"Sorry, I encountered an error while searching: {str(e)}"
+            if not pieces:
+                return error
+            # The sources already went out; the error has to follow them on the stream
+            await publish(f"\n\n{error}")
+            return "".join(pieces)
 
 skill = AgentSkill(
     id='search_agent',
@@ -102,39 +146,46 @@ public_agent_card = AgentCard(
 )
 
 
-class SearchAgentExecutor(AgentExecutor):
+class SearchAgentExecutor(StreamingAgentExecutor):
     """Search Agent Implementation."""
 
+    deadline = agent_deadline('search_agent')
+
     def __init__(self):
         self.agent = SearchAgent()
 
-    async def execute(
-        self,
-        context: RequestContext,
-        event_queue: EventQueue,
-    ) -> None:
-        result = await self.agent.invoke(context.message)
-        await event_queue.enqueue_event(new_agent_text_message(result))
-
-    async def cancel(
-        self, context: RequestContext, event_queue: EventQueue
-    ) -> None:
-        raise Exception('cancel not supported')
 
+def build_app(url: str | None = None, task_store: TaskStore | None = None):
+    """Build the Starlette app serving this agent"""
+    agent_card = public_agent_card
+    if url is not None:
+        agent_card = public_agent_card.model_copy(update={'url': url})
+    if task_store is None:
+        task_store = create_task_store('search_agent')
 
-def main():
+    executor = SearchAgentExecutor()
     request_handler = DefaultRequestHandler(
-        agent_executor=SearchAgentExecutor(),
-        task_store=InMemoryTaskStore(),
+        agent_executor=executor,
+        task_store=task_store,
     )
 
     server = A2AStarletteApplication(
-        agent_card=public_agent_card,
+        agent_card=agent_card,
         http_handler=request_handler,
-        extended_agent_card=public_agent_card,
+        extended_agent_card=agent_card,
+    )
+    # Weave is set up in the background once the server starts, never before it listens
+    app = server.build(
+        on_startup=[lambda: start_tracing('a2a-search-agent')],
+        on_shutdown=[task_store.close, executor.agent.search.close],
     )
+    app.add_middleware(AdmissionMiddleware, name='search_agent')
+    add_metrics(app, agent_card.name)
+    return app
 
-    uvicorn.run(server.build(), host='0.0.0.0', port=9999)
+
+def main():
+    uvicorn.run(build_app(), host='0.0.0.0', port=9999)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,113 @@
+"""
+Single-flight coalescing of identical concurrent agent requests.
+
+When several callers ask for the same key at the same time, only the first
+one starts the upstream LLM/Exa call. Every caller waits on that shared call
+and receives its result; streaming callers are replayed the deltas produced
+so far and then follow along live. The shared call is only cancelled once
+every caller waiting on it has gone away.
+"""
+
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable
+
+OnDelta = Callable[[str], Awaitable[None]]
+
+
+def flight_key(*parts: str) -> str:
+    """Build a compact key from the parts identifying a request"""
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    """State shared by all callers of one in-flight call."""
+
+    def __init__(self):
+        self.deltas: list[str] = []
+        self.changed = asyncio.Event()
+        self.waiters = 0
+        self.task: asyncio.Task | None = None
+
+    async def publish(self, delta: str) -> None:
+        self.deltas.append(delta)
+        self._notify()
+
+    def _notify(self) -> None:
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one upstream call."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.collapsed = 0
+        self._flights: dict[str, _Flight] = {}
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[OnDelta], Awaitable[Any]],
+        on_delta: OnDelta | None = None,
+    ) -> Any:
+        """Run `fn(on_delta)` once per key, sharing the result with concurrent callers"""
+        self.calls += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            flight.task = asyncio.create_task(fn(flight.publish))
+            flight.task.add_done_callback(lambda _: self._finish(key, flight))
+            self._flights[key] = flight
+        else:
+            self.collapsed += 1
+
+        flight.waiters += 1
+        try:
+            delivered = 0
+            while True:
+                changed = flight.changed
+                if on_delta is not None:
+                    while delivered < len(flight.deltas):
+                        await on_delta(flight.deltas[delivered])
+                        delivered += 1
+                if flight.task.done():
+                    break
+                await changed.wait()
+            return flight.task.result()
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is left to receive the result; stop paying for it
+                flight.task.cancel()
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+
+    def _finish(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        flight._notify()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "collapsed": self.collapsed,
+            "in_flight": len(self._flights),
+        }
+
+
+_registry: dict[str, SingleFlight] = {}
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    """Return the process-wide SingleFlight group for `name`"""
+    if name not in _registry:
+        _registry[name] = SingleFlight(name)
+    return _registry[name]
+
+
+def single_flight_stats() -> dict[str, dict]:
+    """Collapsed-call counters for every SingleFlight group"""
+    return {name: group.stats() for name, group in _registry.items()}
@@ -0,0 +1,146 @@
+"""
+A2A client for the specialist agents, used by the packing agent to fan out.
+
+`fan_out` asks the clothing, documents, research and personal-belongings
+agents the same question concurrently over one pooled HTTP client. Each
+call is bounded by that specialist's own deadline (e.g.
+`CLOTHING_AGENT_DEADLINE_MS`) and by a share of the caller's remaining
+budget, and the budget is passed along as `deadlineMs` so the specialist
+degrades on its own instead of being cut off. Answers are reported as each
+specialist finishes, so the total wait is the slowest specialist, not the
+sum of all of them.
+
+Specialist URLs default to the per-port agents and can be overridden with
+e.g. `CLOTHING_AGENT_URL` (the single-process host points them at its mounts).
+"""
+
+import asyncio
+import os
+import uuid
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+import httpx
+from a2a.client import A2AClient
+from a2a.types import (
+    Message,
+    MessageSendParams,
+    Part,
+    Role,
+    SendMessageRequest,
+    Task,
+    TextPart,
+)
+
+from deadline import DEADLINE_GRACE, Deadline, agent_deadline
+
+SPECIALIST_MAX_CONNECTIONS = int(os.getenv("SPECIALIST_MAX_CONNECTIONS", "20"))
+# Share of the caller's remaining budget the specialists may use; synthesis gets the rest
+SPECIALIST_DEADLINE_SHARE = float(os.getenv("SPECIALIST_DEADLINE_SHARE", "0.6"))
+
+
+@dataclass(frozen=True)
+class Specialist:
+    """A specialist agent the packing agent can consult."""
+
+    agent_id: str
+    name: str
+    default_url: str
+
+    @property
+    def url(self) -> str:
+        return os.getenv(f"{self.agent_id.upper()}_URL", self.default_url)
+
+
+SPECIALISTS = [
+    Specialist("clothing_agent", "Clothing", "http://localhost:9998/"),
+    Specialist("documents_agent", "Documents", "http://localhost:9995/"),
+    Specialist("research_agent", "Research", "http://localhost:9996/"),
+    Specialist("personal_belongings_agent", "Personal Belongings", "http://localhost:9997/"),
+]
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide pooled client for specialist calls, creating it on first use"""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=SPECIALIST_MAX_CONNECTIONS),
+            timeout=httpx.Timeout(None, connect=5.0),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _answer_text(result: Task | Message) -> str:
+    if isinstance(result, Message):
+        parts = result.parts
+    else:
+        parts = [part for artifact in result.artifacts or [] for part in artifact.parts]
+    return "".join(part.root.text for part in parts if isinstance(part.root, TextPart))
+
+
+async def ask(specialist: Specialist, text: str, timeout: float) -> str:
+    """Ask one specialist over A2A `message/send`, giving it `timeout` seconds to answer"""
+    message = Message(
+        role=Role.user,
+        parts=[Part(root=TextPart(text=text))],
+        messageId=str(uuid.uuid4()),
+        metadata={"deadlineMs": int(timeout * 1000)},
+    )
+    client = A2AClient(get_http_client(), url=specialist.url)
+    response = await asyncio.wait_for(
+        client.send_message(
+            SendMessageRequest(id=str(uuid.uuid4()), params=MessageSendParams(message=message)),
+            http_kwargs={"timeout": timeout + DEADLINE_GRACE},
+        ),
+        timeout + DEADLINE_GRACE,
+    )
+    result = response.root
+    if not hasattr(result, "result"):
+        raise RuntimeError(result.error.message)
+    return _answer_text(result.result)
+
+
+async def fan_out(
+    text: str,
+    deadline: Deadline,
+    on_answer: Callable[[Specialist, str | None], Awaitable[None]],
+    specialists: list[Specialist] = SPECIALISTS,
+) -> dict[str, str]:
+    """Ask every specialist concurrently, calling `on_answer` as each one finishes.
+
+    `on_answer` gets None for a specialist that failed or ran out of time.
+    Returns the answers that arrived, by specialist name.
+    """
+    budget = deadline.share(SPECIALIST_DEADLINE_SHARE)
+
+    async def consult(specialist: Specialist) -> tuple[Specialist, str | None]:
+        try:
+            return specialist, await ask(specialist, text, min(budget, agent_deadline(specialist.agent_id)))
+        except Exception as e:
+            # Timeouts, connection and A2A errors alike: plan without this specialist
+            print(f"⚠️  {specialist.name} agent unavailable: {e!r}")
+            return specialist, None
+
+    tasks = [asyncio.create_task(consult(specialist)) for specialist in specialists]
+    answers: dict[str, str] = {}
+    try:
+        for finished in asyncio.as_completed(tasks):
+            specialist, answer = await finished
+            if answer:
+                answers[specialist.name] = answer
+            await on_answer(specialist, answer)
+    finally:
+        # Canceled requests stop the calls still in flight
+        for task in tasks:
+            task.cancel()
+    return answers
@@ -2,30 +2,58 @@
 """
 A2A Travel Packing Agents - Start All Script (Python version)
 Cross-platform script to start all travel packing agents
+
+Agents are launched in parallel and each one is polled on its agent card
+(/.well-known/agent.json) until it answers, so startup takes as long as the
+slowest real boot. Once they are ready, the response caches are warmed by a
+background warmup.py process while the script supervises the agents: a
+crashed agent, or one whose agent card stops answering, is restarted with
+exponential backoff.
 """
 
+import argparse
+import atexit
 import subprocess
 import time
 import signal
 import sys
 import os
+import urllib.request
 from typing import List
 
+# Supervisor settings (seconds)
+READY_TIMEOUT = float(os.getenv("AGENT_READY_TIMEOUT", "60"))
+READY_POLL_INTERVAL = 0.1
+SUPERVISE_INTERVAL = 1.0
+RESTART_BACKOFF_INITIAL = 1.0
+RESTART_BACKOFF_MAX = 30.0
+# An agent that stays up this long gets its restart backoff reset
+RESTART_BACKOFF_RESET = 60.0
+# Ready agents are polled this often; one failing this many checks in a row is hung
+HEALTH_CHECK_INTERVAL = 5.0
+HEALTH_CHECK_TIMEOUT = 2.0
+HEALTH_CHECK_FAILURES = 3
+
+# "warmup": answers are cached, so warmup.py precomputes common ones
+# (search depends on live results, packing on session state)
 AGENTS = [
-    {"name": "Personal Belongings", "file": "personal_belongings.py", "port": 9997, "emoji": "🎒"},
-    {"name": "Clothing", "file": "clothing.py", "port": 9998, "emoji": "👕"},
-    {"name": "Search", "file": "search.py", "port": 9999, "emoji": "🔍"},
-    {"name": "Documents", "file": "documents.py", "port": 9995, "emoji": "📄"},
-    {"name": "Research", "file": "research.py", "port": 9996, "emoji": "🗺️"},
-    {"name": "Packing", "file": "packing.py", "port": 9994, "emoji": "📦"},
+    {"name": "Personal Belongings", "file": "personal_belongings.py", "port": 9997, "emoji": "🎒", "card": "/.well-known/agent.json", "warmup": True},
+    {"name": "Clothing", "file": "clothing.py", "port": 9998, "emoji": "👕", "card": "/.well-known/agent.json", "warmup": True},
+    {"name": "Search", "file": "search.py", "port": 9999, "emoji": "🔍", "card": "/.well-known/agent.json", "warmup": False},
+    {"name": "Documents", "file": "documents.py", "port": 9995, "emoji": "📄", "card": "/.well-known/agent.json", "warmup": True},
+    {"name": "Research", "file": "research.py", "port": 9996, "emoji": "🗺️", "card": "/.well-known/agent.json", "warmup": True},
+    {"name": "Packing", "file": "packing.py", "port": 9994, "emoji": "📦", "card": "/.well-known/agent.json", "warmup": False},
 ]
 
+# All agents are mounted together, so one agent card answering means the host is up
+HOST = {"name": "All Agents (single process)", "file": "host.py", "port": 9990, "emoji": "🧳", "card": "/packing/.well-known/agent.json"}
+
 processes: List[subprocess.Popen] = []
 
-def cleanup_processes():
+def cleanup_processes(agents):
     """Clean up existing processes on agent ports"""
     print("Cleaning up existing processes...")
-    for agent in AGENTS:
+    for agent in agents:
         try:
             # Try to kill processes on the port (Unix/Linux/macOS)
             subprocess.run(
@@ -37,73 +65,279 @@ def cleanup_processes():
         except:
             pass
 
-def signal_handler(sig, frame):
-    """Handle Ctrl+C gracefully"""
-    print("\n🛑 Stopping all agents...")
-    for process in processes:
+class AgentProcess:
+    """One supervised agent process with its boot and restart bookkeeping."""
+
+    def __init__(self, agent: dict, env: dict):
+        self.agent = agent
+        self.env = env
+        self.process: subprocess.Popen | None = None
+        self.started_at = 0.0
+        self.ready_at: float | None = None
+        self.restarts = 0
+        self.backoff = RESTART_BACKOFF_INITIAL
+        self.restart_at: float | None = None
+        self.failed_checks = 0
+        self.checked_at = 0.0
+
+    def start(self) -> None:
+        self.process = subprocess.Popen(
+            ["uv", "run", "python", self.agent["file"]],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=self.env,
+            # Own process group, so stopping it also stops the python child of `uv run`
+            start_new_session=hasattr(os, "killpg"),
+        )
+        processes.append(self.process)
+        self.started_at = time.monotonic()
+        self.ready_at = None
+        self.restart_at = None
+        self.failed_checks = 0
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def poll_card(self, timeout: float) -> bool:
+        """Fetch the agent card once, returning whether it answered"""
+        url = f"http://localhost:{self.agent['port']}{self.agent['card']}"
         try:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                return response.status == 200
+        except Exception:
+            return False
+
+    def check_ready(self) -> bool:
+        """Poll the agent card once, recording the boot time on first success"""
+        if self.ready_at is not None:
+            return True
+        if not self.poll_card(timeout=0.5):
+            return False
+        self.ready_at = time.monotonic()
+        return True
+
+    def check_health(self, now: float) -> bool:
+        """Poll a ready agent every HEALTH_CHECK_INTERVAL; False once it has failed too many checks"""
+        if now - self.checked_at < HEALTH_CHECK_INTERVAL:
+            return True
+        self.checked_at = now
+        if self.poll_card(timeout=HEALTH_CHECK_TIMEOUT):
+            self.failed_checks = 0
+        else:
+            self.failed_checks += 1
+        return self.failed_checks < HEALTH_CHECK_FAILURES
+
+    @property
+    def boot_time(self) -> float:
+        return self.ready_at - self.started_at
+
+    def label(self) -> str:
+        return f"{self.agent['emoji']} {self.agent['name']} Agent (Port {self.agent['port']})"
+
+
+def stop_process(process: subprocess.Popen) -> None:
+    """Terminate a process (and its process group), killing it if it doesn't exit"""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGTERM)
+        else:
             process.terminate()
-            process.wait(timeout=5)
-        except:
-            try:
+        process.wait(timeout=5)
+    except Exception:
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
                 process.kill()
-            except:
-                pass
+        except Exception:
+            pass
+
+
+def start_warmup(single_process: bool, env: dict) -> None:
+    """Warm the agents' response caches in a background warmup.py process"""
+    targets = []
+    for agent in AGENTS:
+        if not agent["warmup"]:
+            continue
+        module = os.path.splitext(agent["file"])[0]
+        if single_process:
+            url = f"http://localhost:{HOST['port']}/{module.replace('_', '-')}/"
+        else:
+            url = f"http://localhost:{agent['port']}/"
+        targets.append(f"{module}_agent={url}")
+    try:
+        process = subprocess.Popen(
+            ["uv", "run", "python", "warmup.py", *targets],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=env,
+            start_new_session=hasattr(os, "killpg"),
+        )
+    except Exception as e:
+        print(f"⚠️  Cache warm-up skipped: {e}")
+        return
+    # Stopped along with the agents if it is still running
+    processes.append(process)
+
+
+def stop_all() -> None:
+    """Stop every child process that is still running"""
+    running = [process for process in processes if process.poll() is None]
+    if not running:
+        return
+    print("\n🛑 Stopping all agents...")
+    for process in running:
+        stop_process(process)
     print("✅ All agents stopped!")
+
+
+def signal_handler(sig, frame):
+    """Handle Ctrl+C, SIGTERM and SIGHUP gracefully"""
+    stop_all()
     sys.exit(0)
 
+
+def wait_until_ready(supervised: List[AgentProcess], timeout: float) -> bool:
+    """Poll every agent until all are ready, printing each boot time as it comes up"""
+    deadline = time.monotonic() + timeout
+    pending = list(supervised)
+    while pending and time.monotonic() < deadline:
+        for agent in list(pending):
+            if agent.check_ready():
+                print(f"  ✅ {agent.label()} ready in {agent.boot_time:.2f}s")
+                pending.remove(agent)
+            elif not agent.is_alive():
+                print(f"  ❌ {agent.label()} exited during startup (code {agent.process.returncode})")
+                pending.remove(agent)
+        if pending:
+            time.sleep(READY_POLL_INTERVAL)
+    for agent in pending:
+        print(f"  ⚠️  {agent.label()} not ready after {timeout:.0f}s")
+    return all(agent.ready_at is not None for agent in supervised)
+
+
+def supervise(supervised: List[AgentProcess]) -> None:
+    """Restart crashed or hung agents with exponential backoff until interrupted"""
+    while True:
+        time.sleep(SUPERVISE_INTERVAL)
+        now = time.monotonic()
+        for agent in supervised:
+            if agent.is_alive():
+                if agent.ready_at is None:
+                    if agent.check_ready():
+                        print(f"✅ {agent.label()} ready in {agent.boot_time:.2f}s")
+                elif not agent.check_health(now):
+                    # Hung but still running: stop it and let the restart below bring it back
+                    print(f"⚠️  {agent.label()} failed {agent.failed_checks} health checks, stopping it")
+                    stop_process(agent.process)
+                    continue
+                if now - agent.started_at >= RESTART_BACKOFF_RESET:
+                    agent.backoff = RESTART_BACKOFF_INITIAL
+                continue
+            if agent.restart_at is None:
+                print(
+                    f"⚠️  {agent.label()} exited (code {agent.process.returncode}), "
+                    f"restarting in {agent.backoff:.0f}s"
+                )
+                agent.restart_at = now + agent.backoff
+                agent.backoff = min(agent.backoff * 2, RESTART_BACKOFF_MAX)
+            elif now >= agent.restart_at:
+                processes.remove(agent.process)
+                agent.restarts += 1
+                print(f"🔄 Restarting {agent.label()} (restart #{agent.restarts})")
+                agent.start()
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Start all travel packing agents")
+    parser.add_argument(
+        "--single-process",
+        action="store_true",
+        help="Host every agent in one process on port 9990 (see host.py) instead of one process per port",
+    )
+    parser.add_argument(
+        "--task-store",
+        choices=["memory", "sqlite"],
+        default=os.getenv("TASK_STORE", "memory"),
+        help="Task store backend: bounded in-memory or persistent SQLite (tasks.db)",
+    )
+    parser.add_argument(
+        "--ready-timeout",
+        type=float,
+        default=READY_TIMEOUT,
+        help="Seconds to wait for each agent card to answer before reporting it as not ready",
+    )
+    parser.add_argument(
+        "--no-warmup",
+        action="store_true",
+        default=os.getenv("WARMUP", "1") == "0",
+        help="Skip precomputing answers for the skill examples and popular destinations at startup",
+    )
+    args = parser.parse_args()
+    agents = [HOST] if args.single_process else AGENTS
+    env = dict(os.environ, TASK_STORE=args.task_store)
+    if not args.no_warmup:
+        # Persist warmed answers so restarts reuse them instead of recomputing
+        env.setdefault("RESPONSE_CACHE_DB", "response_cache.db")
+
     print("🧳 Starting all travel packing agents...")
 
-    # Setup signal handler for graceful shutdown
+    # The agents run in their own sessions and don't get the launcher's signals,
+    # so stop them on every way out: Ctrl+C, SIGTERM, SIGHUP or an error
     signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, signal_handler)
+    atexit.register(stop_all)
 
-    cleanup_processes()
+    cleanup_processes(agents)
 
     print("Starting agents...")
 
-    # Start all agents in the background
-    for agent in AGENTS:
+    # Launch everything at once; readiness is checked per agent below
+    started = time.monotonic()
+    supervised = []
+    for agent in agents:
         print(f"  {agent['emoji']} {agent['name']} Agent (Port {agent['port']})...")
+        supervisor = AgentProcess(agent, env)
         try:
-            # Use shell=True for simpler process management
-            process = subprocess.Popen(
-                f"uv run python {agent['file']}",
-                shell=True,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                cwd=os.path.dirname(os.path.abspath(__file__))
-            )
-            processes.append(process)
-            time.sleep(1)  # Longer delay for startup
+            supervisor.start()
         except Exception as e:
             print(f"❌ Failed to start {agent['name']} Agent: {e}")
             continue
+        supervised.append(supervisor)
 
-    # Wait for startup
-    time.sleep(5)
+    print("")
+    print("Waiting for agents to be ready...")
+    all_ready = wait_until_ready(supervised, args.ready_timeout)
 
     print("")
-    print("✅ All agents started successfully!")
+    if all_ready:
+        print(f"✅ All agents ready in {time.monotonic() - started:.2f}s")
+    else:
+        print("⚠️  Some agents are not ready; they will be restarted if they crash")
     print("")
     print("Agent Status:")
-    for agent in AGENTS:
-        print(f"  {agent['name']:18}: http://localhost:{agent['port']}")
+    if args.single_process:
+        for agent in AGENTS:
+            path = os.path.splitext(agent["file"])[0].replace("_", "-")
+            print(f"  {agent['name']:18}: http://localhost:{HOST['port']}/{path}")
+    else:
+        for agent in AGENTS:
+            print(f"  {agent['name']:18}: http://localhost:{agent['port']}")
+
+    if not args.no_warmup:
+        print("")
+        start_warmup(args.single_process, env)
 
     print("")
     print("🌍 Frontend: http://localhost:3000")
     print("")
     print("Press Ctrl+C to stop all agents")
 
-    # Keep the script running and monitor processes
+    # Keep the script running and restart agents that crash
     try:
-        while True:
-            time.sleep(10)  # Check every 10 seconds
-            # Optionally check if processes are still alive
-            alive_count = sum(1 for p in processes if p.poll() is None)
-            if alive_count == 0:
-                print("⚠️  All agents have stopped")
-                break
+        supervise(supervised)
     except KeyboardInterrupt:
         signal_handler(signal.SIGINT, None)
 
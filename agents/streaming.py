@@ -0,0 +1,288 @@
+"""
+Streaming support for the travel packing agents.
+
+Agents produce their answers incrementally through an `on_delta` callback.
+`ResponseStream` turns those deltas into A2A task events: the task is created
+and marked working up front, text is published as chunks of a single artifact,
+and the task is completed once the answer is done. `message/stream` clients
+see the first tokens as soon as the LLM emits them, while `message/send`
+clients receive the finished task with the whole answer in its artifact.
+
+Executors may also publish structured data (e.g. agent state) as a separate
+`DataPart` artifact next to the text answer.
+
+`tasks/cancel` cancels the running `invoke` coroutine, which aborts the
+underlying OpenAI stream or Exa request and releases its connection, then
+marks the task canceled. `cancel_stats()` reports what cancellation saved.
+
+Each request runs under a deadline (see `deadline.py`); if `invoke` is still
+running past it, the answer is cut short with an explanation.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from dataclasses import dataclass
+
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.events import EventQueue
+from a2a.server.tasks import TaskUpdater
+from a2a.types import DataPart, Part, TaskNotCancelableError, TaskState, TextPart
+from a2a.utils import new_agent_text_message, new_task
+from a2a.utils.errors import ServerError
+
+from deadline import (
+    AGENT_DEADLINE_MS,
+    DEADLINE_GRACE,
+    Deadline,
+    create_task_with_deadline,
+    record_degraded,
+)
+from metrics import IN_FLIGHT, REQUEST_LATENCY, REQUESTS, TIME_TO_FIRST_TOKEN
+
+# Deltas are coalesced into chunks so a long answer doesn't become one event per token
+STREAM_CHUNK_CHARS = int(os.getenv("STREAM_CHUNK_CHARS", "64"))
+STREAM_FLUSH_INTERVAL = float(os.getenv("STREAM_FLUSH_INTERVAL", "0.1"))
+
+# Rough size of an output token, used to estimate the tokens a cancel saved
+CHARS_PER_TOKEN = 4
+
+TERMINAL_STATES = {TaskState.completed, TaskState.canceled, TaskState.failed, TaskState.rejected}
+
+
+class ResponseStream:
+    """Publishes an agent answer as artifact chunks on its A2A task."""
+
+    def __init__(self, context: RequestContext, event_queue: EventQueue, name: str = "response"):
+        self.context = context
+        self.event_queue = event_queue
+        self.name = name
+        self.artifact_id = str(uuid.uuid4())
+        self.updater: TaskUpdater | None = None
+        self._buffer: list[str] = []
+        self._buffered_chars = 0
+        self._chunks_sent = 0
+        self._last_flush = 0.0
+        self.streamed_chars = 0
+        self.started = time.monotonic()
+
+    async def start(self) -> None:
+        """Create the task if needed and mark it as working"""
+        task = self.context.current_task
+        if task is None:
+            task = new_task(self.context.message)
+            await self.event_queue.enqueue_event(task)
+        self.updater = TaskUpdater(self.event_queue, task.id, task.contextId)
+        await self.updater.start_work()
+
+    async def write(self, delta: str) -> None:
+        """Queue a piece of the answer, flushing when the chunk is large or old enough"""
+        if not delta:
+            return
+        if self.streamed_chars == 0:
+            TIME_TO_FIRST_TOKEN.observe(time.monotonic() - self.started)
+        self._buffer.append(delta)
+        self._buffered_chars += len(delta)
+        self.streamed_chars += len(delta)
+        # The first chunk goes out immediately to keep time-to-first-token low
+        if (
+            self._chunks_sent == 0
+            or self._buffered_chars >= STREAM_CHUNK_CHARS
+            or time.monotonic() - self._last_flush >= STREAM_FLUSH_INTERVAL
+        ):
+            await self._flush()
+
+    async def _flush(self, last_chunk: bool = False) -> None:
+        if not self._buffer and not last_chunk:
+            return
+        text = "".join(self._buffer)
+        self._buffer.clear()
+        self._buffered_chars = 0
+        # With nothing left to send, the last chunk only carries the marker, not an empty part
+        await self.updater.add_artifact(
+            [Part(root=TextPart(text=text))] if text else [],
+            artifact_id=self.artifact_id,
+            name=self.name,
+            append=self._chunks_sent > 0,
+            last_chunk=last_chunk,
+        )
+        self._chunks_sent += 1
+        self._last_flush = time.monotonic()
+
+    async def add_data(self, data: dict, name: str) -> None:
+        """Publish structured data as its own single-chunk artifact"""
+        await self.updater.add_artifact([Part(root=DataPart(data=data))], name=name)
+
+    async def finish(self, text: str | None = None) -> None:
+        """Flush the remaining text and complete the task.
+
+        `text` is the full answer; it is only published when nothing was
+        streamed, e.g. for answers that didn't come from the LLM.
+        """
+        if self._chunks_sent == 0 and not self._buffer and text:
+            self._buffer.append(text)
+        await self._flush(last_chunk=True)
+        await self.updater.complete()
+
+    async def fail(self, error: str) -> None:
+        """Mark the task as failed with an explanatory agent message"""
+        await self.updater.failed(
+            new_agent_text_message(error, self.updater.context_id, self.updater.task_id)
+        )
+
+
+class CancelStats:
+    """Counts canceled requests and estimates the output tokens and time they saved.
+
+    Savings are estimated against the average length and duration of the
+    answers that ran to completion.
+    """
+
+    def __init__(self):
+        self.completed = 0
+        self.completed_chars = 0
+        self.completed_seconds = 0.0
+        self.canceled = 0
+        self.tokens_saved = 0
+        self.seconds_saved = 0.0
+
+    def record_completed(self, chars: int, seconds: float) -> None:
+        self.completed += 1
+        self.completed_chars += chars
+        self.completed_seconds += seconds
+
+    def record_canceled(self, chars: int, seconds: float) -> None:
+        self.canceled += 1
+        if self.completed:
+            average_chars = self.completed_chars / self.completed
+            average_seconds = self.completed_seconds / self.completed
+            self.tokens_saved += int(max(0.0, average_chars - chars) / CHARS_PER_TOKEN)
+            self.seconds_saved += max(0.0, average_seconds - seconds)
+
+    def stats(self) -> dict:
+        return {
+            "completed": self.completed,
+            "canceled": self.canceled,
+            "tokens_saved": self.tokens_saved,
+            "seconds_saved": round(self.seconds_saved, 3),
+        }
+
+
+@dataclass
+class _Execution:
+    """An in-flight `invoke` and the stream publishing its answer."""
+
+    invoke: asyncio.Task
+    stream: ResponseStream
+    started: float
+    canceled: bool = False
+
+
+# Running executions by task id, shared by every executor in the process
+_executions: dict[str, _Execution] = {}
+_cancel_stats = CancelStats()
+
+
+def cancel_stats() -> dict:
+    """Cancellation counters for this process"""
+    return {**_cancel_stats.stats(), "in_flight": len(_executions)}
+
+
+class StreamingAgentExecutor(AgentExecutor):
+    """Executor that streams `self.agent.invoke` output into the task artifact.
+
+    Subclasses set `self.agent` to an object whose async `invoke(message, on_delta)`
+    returns the full answer and calls `on_delta` for each generated piece.
+    Subclasses may override `state_update` to attach structured state.
+    `cancel` stops the running `invoke` and marks the task canceled.
+    `deadline` is the default request budget in seconds.
+    """
+
+    agent = None
+    deadline = AGENT_DEADLINE_MS / 1000
+
+    def state_update(self, context: RequestContext) -> dict | None:
+        """Structured state to publish as a "state" artifact after the answer"""
+        return None
+
+    async def execute(
+        self,
+        context: RequestContext,
+        event_queue: EventQueue,
+    ) -> None:
+        started = time.monotonic()
+        IN_FLIGHT.inc()
+        outcome = "failed"
+        try:
+            outcome = await self._execute(context, event_queue)
+        except asyncio.CancelledError:
+            outcome = "canceled"
+            raise
+        finally:
+            IN_FLIGHT.dec()
+            REQUESTS.inc(outcome=outcome)
+            if outcome in ("completed", "degraded"):
+                REQUEST_LATENCY.observe(time.monotonic() - started)
+
+    async def _execute(self, context: RequestContext, event_queue: EventQueue) -> str:
+        """Run the agent for one request and return its outcome (completed, degraded, ...)"""
+        stream = ResponseStream(context, event_queue)
+        await stream.start()
+        deadline = Deadline.for_message(context.message, self.deadline)
+        execution = _Execution(
+            invoke=create_task_with_deadline(
+                self.agent.invoke(context.message, on_delta=stream.write), deadline
+            ),
+            stream=stream,
+            started=time.monotonic(),
+        )
+        task_id = stream.updater.task_id
+        _executions[task_id] = execution
+        try:
+            # Agents degrade on their own at the deadline; this is the backstop
+            result = await asyncio.wait_for(execution.invoke, deadline.remaining() + DEADLINE_GRACE)
+        except asyncio.CancelledError:
+            # Canceled through tasks/cancel, which already published the canceled status
+            if execution.canceled:
+                return "canceled"
+            raise
+        except asyncio.TimeoutError:
+            record_degraded()
+            outcome = "degraded"
+            result = "Sorry, I ran out of time to finish this answer. Please try again."
+            if stream.streamed_chars:
+                await stream.write(f"\n\n{result}")
+        except Exception as e:
+            await stream.fail(f"Sorry, the agent failed to answer: {str(e)}")
+            return "failed"
+        else:
+            outcome = "completed"
+            _cancel_stats.record_completed(len(result or ""), time.monotonic() - execution.started)
+        finally:
+            _executions.pop(task_id, None)
+        state = self.state_update(context)
+        if state is not None:
+            await stream.add_data(state, name="state")
+        await stream.finish(result)
+        return outcome
+
+    async def cancel(
+        self, context: RequestContext, event_queue: EventQueue
+    ) -> None:
+        execution = _executions.pop(context.task_id, None)
+        if execution is None:
+            task = context.current_task
+            if task is None or task.status.state in TERMINAL_STATES:
+                raise ServerError(error=TaskNotCancelableError())
+            # Nothing is running for this task (e.g. after a restart): just mark it
+            await TaskUpdater(event_queue, task.id, task.contextId).cancel()
+            return
+
+        execution.canceled = True
+        execution.invoke.cancel()
+        _cancel_stats.record_canceled(
+            execution.stream.streamed_chars, time.monotonic() - execution.started
+        )
+        # Published on the request's own queue so streaming clients see it too
+        await execution.stream.updater.cancel()
@@ -0,0 +1,226 @@
+"""
+Task stores for the agent servers.
+
+`BoundedTaskStore` keeps tasks in memory like `InMemoryTaskStore` but caps
+them by count (LRU) and age (TTL), so memory stays flat under sustained load.
+`SQLiteTaskStore` adds a persistent SQLite database (WAL mode) behind the same
+bounded cache; writes are batched and flushed in the background, so
+`tasks/get` keeps working across restarts without a disk write per event.
+Agents share the database file, but each store only sees, deletes and
+prunes the rows of its own agent.
+
+Pick one with `TASK_STORE=memory|sqlite` (or `--task-store` on the launchers).
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+
+from a2a.server.tasks import TaskStore
+from a2a.types import Task
+
+logger = logging.getLogger(__name__)
+
+TASK_STORE = os.getenv("TASK_STORE", "memory")
+TASK_STORE_MAX_TASKS = int(os.getenv("TASK_STORE_MAX_TASKS", "10000"))
+TASK_STORE_MAX_AGE = float(os.getenv("TASK_STORE_MAX_AGE", "3600"))
+TASK_STORE_PATH = os.getenv("TASK_STORE_PATH", "tasks.db")
+TASK_STORE_FLUSH_INTERVAL = float(os.getenv("TASK_STORE_FLUSH_INTERVAL", "0.5"))
+TASK_STORE_BATCH_SIZE = int(os.getenv("TASK_STORE_BATCH_SIZE", "200"))
+TASK_STORE_PRUNE_INTERVAL = float(os.getenv("TASK_STORE_PRUNE_INTERVAL", "60"))
+
+
+class BoundedTaskStore(TaskStore):
+    """In-memory task store with LRU eviction by count and TTL eviction by age."""
+
+    def __init__(self, max_tasks: int = TASK_STORE_MAX_TASKS, max_age: float = TASK_STORE_MAX_AGE):
+        self.max_tasks = max_tasks
+        self.max_age = max_age
+        self.evictions = 0
+        self.tasks: OrderedDict[str, tuple[float, Task]] = OrderedDict()
+
+    async def save(self, task: Task) -> None:
+        self.tasks[task.id] = (time.monotonic(), task)
+        self.tasks.move_to_end(task.id)
+        self._evict()
+
+    async def get(self, task_id: str) -> Task | None:
+        entry = self.tasks.get(task_id)
+        if entry is None:
+            return None
+        saved_at, task = entry
+        if time.monotonic() - saved_at > self.max_age:
+            del self.tasks[task_id]
+            self.evictions += 1
+            return None
+        self.tasks.move_to_end(task_id)
+        return task
+
+    async def delete(self, task_id: str) -> None:
+        self.tasks.pop(task_id, None)
+
+    async def close(self) -> None:
+        pass
+
+    def _evict(self) -> None:
+        # Oldest entries sit at the front: drop them while over the cap or too old
+        cutoff = time.monotonic() - self.max_age
+        while self.tasks:
+            saved_at, _ = next(iter(self.tasks.values()))
+            if len(self.tasks) <= self.max_tasks and saved_at >= cutoff:
+                break
+            self.tasks.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+
+class SQLiteTaskStore(BoundedTaskStore):
+    """Persistent task store: bounded memory cache in front of batched SQLite writes."""
+
+    def __init__(
+        self,
+        agent: str,
+        path: str = TASK_STORE_PATH,
+        max_tasks: int = TASK_STORE_MAX_TASKS,
+        max_age: float = TASK_STORE_MAX_AGE,
+        flush_interval: float = TASK_STORE_FLUSH_INTERVAL,
+    ):
+        super().__init__(max_tasks, max_age)
+        self.agent = agent
+        self.flush_interval = flush_interval
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks "
+            "(id TEXT PRIMARY KEY, agent TEXT NOT NULL DEFAULT '', data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        # Databases from before the agent column get it; their old rows belong to no agent
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(tasks)")}
+        if "agent" not in columns:
+            self._conn.execute("ALTER TABLE tasks ADD COLUMN agent TEXT NOT NULL DEFAULT ''")
+        self._conn.execute("DROP INDEX IF EXISTS tasks_updated_at")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_agent_updated_at ON tasks (agent, updated_at)")
+        self._conn.commit()
+        self._last_prune = 0.0
+        # task id -> serialized task, or None for a pending delete
+        self._pending: dict[str, str | None] = {}
+        self._wakeup = asyncio.Event()
+        self._flusher: asyncio.Task | None = None
+        self._db_lock = asyncio.Lock()
+        self._closing = False
+
+    async def save(self, task: Task) -> None:
+        await super().save(task)
+        self._pending[task.id] = task.model_dump_json()
+        self._schedule_flush()
+
+    async def get(self, task_id: str) -> Task | None:
+        task = await super().get(task_id)
+        if task is not None:
+            return task
+        if task_id in self._pending:
+            data = self._pending[task_id]
+            return Task.model_validate_json(data) if data else None
+        async with self._db_lock:
+            row = await asyncio.to_thread(self._read, task_id)
+        if row is None:
+            return None
+        data, updated_at = row
+        if time.time() - updated_at > self.max_age:
+            return None
+        task = Task.model_validate_json(data)
+        await super().save(task)
+        return task
+
+    async def delete(self, task_id: str) -> None:
+        await super().delete(task_id)
+        self._pending[task_id] = None
+        self._schedule_flush()
+
+    async def close(self) -> None:
+        """Flush pending writes and close the database"""
+        # Let the flusher finish its batch: canceling it would leave the write
+        # running in its thread while the connection closes
+        self._closing = True
+        if self._flusher is not None:
+            self._wakeup.set()
+            await self._flusher
+            self._flusher = None
+        await self.flush()
+        async with self._db_lock:
+            self._conn.close()
+
+    async def flush(self) -> None:
+        """Write all pending saves and deletes in a single transaction"""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        async with self._db_lock:
+            await asyncio.to_thread(self._write, batch)
+
+    def _schedule_flush(self) -> None:
+        if self._closing:
+            return
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+        if len(self._pending) >= TASK_STORE_BATCH_SIZE:
+            self._wakeup.set()
+
+    async def _flush_loop(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush tasks to SQLite: {e}")
+
+    def _read(self, task_id: str):
+        return self._conn.execute(
+            "SELECT data, updated_at FROM tasks WHERE id = ? AND agent = ?", (task_id, self.agent)
+        ).fetchone()
+
+    def _write(self, batch: dict[str, str | None]) -> None:
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tasks (id, agent, data, updated_at) VALUES (?, ?, ?, ?)",
+                [(task_id, self.agent, data, now) for task_id, data in batch.items() if data is not None],
+            )
+            self._conn.executemany(
+                "DELETE FROM tasks WHERE id = ? AND agent = ?",
+                [(task_id, self.agent) for task_id, data in batch.items() if data is None],
+            )
+            if now - self._last_prune >= TASK_STORE_PRUNE_INTERVAL:
+                self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        """Apply the age and count limits to this agent's persisted tasks"""
+        # Rows from before the agent column belong to no agent; they only age out
+        self._conn.execute(
+            "DELETE FROM tasks WHERE agent IN (?, '') AND updated_at < ?", (self.agent, now - self.max_age)
+        )
+        self._conn.execute(
+            "DELETE FROM tasks WHERE agent = ? AND id NOT IN "
+            "(SELECT id FROM tasks WHERE agent = ? ORDER BY updated_at DESC LIMIT ?)",
+            (self.agent, self.agent, self.max_tasks),
+        )
+        self._last_prune = now
+
+
+def create_task_store(agent: str, kind: str = TASK_STORE) -> TaskStore:
+    """Create `agent`'s task store of the kind selected by `kind` ("memory" or "sqlite")"""
+    if kind == "sqlite":
+        return SQLiteTaskStore(agent)
+    if kind == "memory":
+        return BoundedTaskStore()
+    raise ValueError(f"Unknown task store: {kind}")
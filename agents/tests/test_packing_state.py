@@ -0,0 +1,33 @@
+from packing_state import DEFAULT_ITEMS, ItemCatalog
+
+catalog = ItemCatalog(DEFAULT_ITEMS)
+
+
+def find_id(name: str) -> str | None:
+    index = catalog.find(name)
+    return None if index is None else catalog.items[index].id
+
+
+def test_exact_name_and_id():
+    assert find_id("Passport") == "passport"
+    assert find_id("tshirts") == "tshirts"
+
+
+def test_multi_word_spelling_of_one_word_name():
+    assert find_id("head phones") == "headphones"
+    assert find_id("Head-Phones") == "headphones"
+    assert find_id("tooth brush") == "toothbrush"
+    assert find_id("t shirts") == "tshirts"
+
+
+def test_shared_word_still_matches():
+    assert find_id("phone") == "phone"
+    assert find_id("my phone charger") == "charger"
+
+
+def test_typo():
+    assert find_id("pasport") == "passport"
+
+
+def test_unrelated_name():
+    assert find_id("umbrella") is None
@@ -0,0 +1,228 @@
+"""
+Weave tracing for the agents, kept off the startup and request paths.
+
+`weave` is only imported, and `weave.init` only called, in a background
+thread started once the server is starting up, so a slow or failing init
+never delays the agent from serving. Set `WEAVE_TRACING=0` to skip tracing
+entirely.
+
+`traced(agent_id)` decides per call whether to trace (head-based sampling at
+the agent's `TRACE_SAMPLE_RATE`; calls that raise are always traced). A traced
+call only costs the request a queue put: capturing size-capped inputs/outputs
+and sending them to Weave happen in batches on a background exporter thread.
+Spans that arrive while the queue is full are dropped and counted. Because
+export is deferred, the real start time and latency are attached to each
+Weave call as attributes.
+"""
+
+import functools
+import inspect
+import json
+import os
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+WEAVE_TRACING = os.getenv("WEAVE_TRACING", "1").lower() not in ("0", "false", "off", "no")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+TRACE_MAX_PAYLOAD_CHARS = int(os.getenv("TRACE_MAX_PAYLOAD_CHARS", "2000"))
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "1000"))
+TRACE_BATCH_SIZE = int(os.getenv("TRACE_BATCH_SIZE", "50"))
+TRACE_FLUSH_INTERVAL = float(os.getenv("TRACE_FLUSH_INTERVAL", "2"))
+
+_client = None
+_started = False
+_lock = threading.Lock()
+
+
+def start_tracing(project: str) -> None:
+    """Initialize Weave for `project` in the background (only the first call counts)"""
+    global _started
+    if not WEAVE_TRACING:
+        return
+    with _lock:
+        if _started:
+            return
+        _started = True
+    threading.Thread(target=_init, args=(project,), name="weave-init", daemon=True).start()
+
+
+def _init(project: str) -> None:
+    global _client
+    started = time.perf_counter()
+    try:
+        import weave
+
+        _client = weave.init(project)
+    except Exception as e:
+        print(f"⚠️  Weave initialization failed: {e}")
+        print("Agent will run without Weave tracing")
+        return
+    print(f"✅ Weave initialized for {project} in {time.perf_counter() - started:.2f}s")
+
+
+def tracing_ready() -> bool:
+    return _client is not None
+
+
+def trace_sample_rate(agent_id: str) -> float:
+    """Sampling rate for `agent_id`, e.g. from SEARCH_AGENT_TRACE_SAMPLE_RATE"""
+    return float(os.getenv(f"{agent_id.upper()}_TRACE_SAMPLE_RATE", TRACE_SAMPLE_RATE))
+
+
+@dataclass
+class _Span:
+    """A finished call waiting for export; payloads are captured by the exporter."""
+
+    name: str
+    inputs: dict
+    output: Any
+    error: BaseException | None
+    started_at: float
+    duration: float
+
+
+def _capped(value: Any) -> Any:
+    """JSON-friendly, size-capped copy of a traced value"""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        text = value
+    elif hasattr(value, "model_dump_json"):
+        text = value.model_dump_json(exclude_none=True)
+    else:
+        try:
+            text = json.dumps(value, default=repr)
+        except (TypeError, ValueError):
+            text = repr(value)
+    if len(text) > TRACE_MAX_PAYLOAD_CHARS:
+        return f"{text[:TRACE_MAX_PAYLOAD_CHARS]}… [{len(text) - TRACE_MAX_PAYLOAD_CHARS} chars truncated]"
+    return text
+
+
+class TraceExporter:
+    """Bounded span queue drained in batches by a daemon thread."""
+
+    def __init__(self, max_queue: int = TRACE_QUEUE_SIZE, batch_size: int = TRACE_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._queue: queue.Queue[_Span] = queue.Queue(maxsize=max_queue)
+        self._thread: threading.Thread | None = None
+        self.calls = 0
+        self.sampled = 0
+        self.errors = 0
+        self.dropped = 0
+        self.exported = 0
+        self.export_failures = 0
+        self.call_seconds = 0.0
+        self.overhead_seconds = 0.0
+
+    def submit(self, span: _Span) -> None:
+        if self._thread is None:
+            with _lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + TRACE_FLUSH_INTERVAL
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            self._export(batch)
+
+    def _export(self, batch: list[_Span]) -> None:
+        if _client is None:
+            # Weave isn't up (yet, or at all): nothing to send these spans to
+            self.dropped += len(batch)
+            return
+        for span in batch:
+            try:
+                call = _client.create_call(
+                    span.name,
+                    {name: _capped(value) for name, value in span.inputs.items()},
+                    attributes={
+                        "started_at": datetime.fromtimestamp(span.started_at, timezone.utc).isoformat(),
+                        "latency_ms": round(span.duration * 1000, 1),
+                    },
+                    use_stack=False,
+                )
+                _client.finish_call(call, output=_capped(span.output), exception=span.error)
+                self.exported += 1
+            except Exception:
+                self.export_failures += 1
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "sampled": self.sampled,
+            "errors": self.errors,
+            "dropped": self.dropped,
+            "exported": self.exported,
+            "export_failures": self.export_failures,
+            "queue_depth": self._queue.qsize(),
+            "overhead_fraction": round(self.overhead_seconds / self.call_seconds, 6) if self.call_seconds else 0.0,
+        }
+
+
+_exporter = TraceExporter()
+
+
+def tracing_stats() -> dict:
+    return _exporter.stats()
+
+
+def traced(agent_id: str, sample_rate: float | None = None):
+    """Decorate an agent's async method with sampled, batched Weave tracing"""
+    rate = trace_sample_rate(agent_id) if sample_rate is None else sample_rate
+
+    def decorator(func):
+        name = f"{agent_id}.{func.__name__}"
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not WEAVE_TRACING:
+                return await func(*args, **kwargs)
+            entered = time.perf_counter()
+            sampled = random.random() < rate
+            started_at = time.time()
+            called = time.perf_counter()
+            error = None
+            output = None
+            try:
+                output = await func(*args, **kwargs)
+                return output
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                returned = time.perf_counter()
+                _exporter.calls += 1
+                _exporter.call_seconds += returned - called
+                if sampled or error is not None:
+                    _exporter.sampled += sampled
+                    _exporter.errors += error is not None
+                    arguments = signature.bind_partial(*args, **kwargs).arguments
+                    inputs = {
+                        key: value
+                        for key, value in arguments.items()
+                        if key != "self" and not callable(value)
+                    }
+                    _exporter.submit(_Span(name, inputs, output, error, started_at, returned - called))
+                _exporter.overhead_seconds += (called - entered) + (time.perf_counter() - returned)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,123 @@
+"""
+Warm-start for the agents' response caches.
+
+Once the agents are up, the launcher asks them the questions the first
+users are most likely to ask: every skill example from the agent cards plus
+a destination x season matrix for the clothing, research and documents
+agents. The answers land in the response cache, so those users get a cached
+answer instead of a cold completion. With `RESPONSE_CACHE_DB` set (the
+launcher defaults it to response_cache.db) they persist across restarts,
+and the next warm-up is answered from disk.
+
+Prompts go through each agent's regular A2A endpoint, a few at a time. The
+launcher runs this as its own process once the agents are ready, so serving
+never waits on it:
+
+    python warmup.py clothing_agent=http://localhost:9998/ ...
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+from dotenv import load_dotenv
+
+# The launcher does not load .env itself; the WARMUP_* settings live there too
+load_dotenv()
+
+from response_cache import normalize_text
+from specialists import Specialist, ask, close_http_client
+
+WARMUP_DESTINATIONS = [
+    destination.strip()
+    for destination in os.getenv(
+        "WARMUP_DESTINATIONS", "Tokyo,Paris,London,New York,Rome,Barcelona,Bali,Bangkok"
+    ).split(",")
+    if destination.strip()
+]
+WARMUP_SEASONS = [
+    season.strip() for season in os.getenv("WARMUP_SEASONS", "spring,summer,autumn,winter").split(",") if season.strip()
+]
+WARMUP_CONCURRENCY = int(os.getenv("WARMUP_CONCURRENCY", "4"))
+WARMUP_MAX_PROMPTS = int(os.getenv("WARMUP_MAX_PROMPTS", "200"))
+# Budget per warm-up answer; generous, since nobody is waiting on it
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "60"))
+
+# Destination x season prompts per agent; templates without {season} run once per destination
+MATRIX_TEMPLATES = {
+    "clothing_agent": ["What clothes should I pack for {destination} in {season}?"],
+    "research_agent": ["What is the weather like in {destination} in {season}?"],
+    "documents_agent": ["What travel documents do I need for a trip to {destination}?"],
+}
+
+
+def warmup_prompts(agent_id: str, card: dict) -> list[str]:
+    """Skill examples from the agent card, then the destination x season matrix, without duplicates"""
+    prompts = [example for skill in card.get("skills", []) for example in skill.get("examples") or []]
+    for template in MATRIX_TEMPLATES.get(agent_id, []):
+        for destination in WARMUP_DESTINATIONS:
+            for season in WARMUP_SEASONS if "{season}" in template else [None]:
+                prompts.append(template.format(destination=destination, season=season))
+
+    unique: list[str] = []
+    seen: set[str] = set()
+    for prompt in prompts:
+        # Same normalization as the cache key: prompts differing only in case share an answer
+        key = normalize_text(prompt)
+        if key not in seen:
+            seen.add(key)
+            unique.append(prompt)
+    return unique[:WARMUP_MAX_PROMPTS]
+
+
+async def warm_up(urls: dict[str, str], concurrency: int = WARMUP_CONCURRENCY) -> dict:
+    """Ask every agent in `urls` (agent id -> base URL) its warm-up prompts; return counts"""
+    jobs: list[tuple[Specialist, str]] = []
+    async with httpx.AsyncClient(timeout=10) as client:
+        for agent_id, url in urls.items():
+            try:
+                card = (await client.get(f"{url}.well-known/agent.json")).json()
+            except (httpx.HTTPError, ValueError) as e:
+                print(f"⚠️  Warm-up skipped for {agent_id}: {e!r}")
+                continue
+            agent = Specialist(agent_id, card.get("name", agent_id), url)
+            jobs += [(agent, prompt) for prompt in warmup_prompts(agent_id, card)]
+
+    slots = asyncio.Semaphore(concurrency)
+    counts = {"prompts": len(jobs), "warmed": 0, "failed": 0}
+
+    async def warm(agent: Specialist, prompt: str) -> None:
+        async with slots:
+            try:
+                answer = await ask(agent, prompt, WARMUP_TIMEOUT)
+            except Exception:
+                answer = None
+        counts["warmed" if answer else "failed"] += 1
+
+    try:
+        await asyncio.gather(*(warm(agent, prompt) for agent, prompt in jobs))
+    finally:
+        await close_http_client()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm the agents' response caches")
+    parser.add_argument("agents", nargs="+", metavar="AGENT_ID=URL", help="Agent to warm and its base URL")
+    args = parser.parse_args()
+    urls = dict(agent.split("=", 1) for agent in args.agents)
+
+    started = time.monotonic()
+    print(f"🔥 Warming response caches for {len(urls)} agents in the background...")
+    counts = asyncio.run(warm_up(urls))
+    print(
+        f"🔥 Warm-up done: {counts['warmed']}/{counts['prompts']} answers cached "
+        f"in {time.monotonic() - started:.1f}s"
+        + (f" ({counts['failed']} failed)" if counts["failed"] else "")
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -20,7 +20,11 @@ import { LanguageModel, processDataStream, streamText, tool } from "ai";
 import {
   convertMessagesToVercelAISDKMessages,
   convertToolToVercelAISDKTools,
+  applyStateUpdate,
   createSystemPrompt,
+  getResponseText,
+  getStateSyncPart,
+  getStateUpdate,
 } from "./utils";
 import { z } from "zod";
 import { randomUUID } from "crypto";
@@ -292,28 +296,41 @@ export class A2AClientAgent extends AbstractAgent {
                     100
                 );
 
-                // Emit state update
-                observer.next({
-                  type: EventType.STATE_SNAPSHOT,
-                  snapshot: state,
-                } as StateSnapshotEvent);
-
                 // Also send to packing agent
                 const packingAgent = agents["Packing Agent"];
                 if (packingAgent) {
                   const message = `update_packing_state: ${
                     packed ? "packed" : "unpacked"
                   } ${itemName}`;
-                  await packingAgent.client.sendMessage({
+                  const packingResponse = await packingAgent.client.sendMessage({
                     message: {
                       kind: "message",
                       messageId: Date.now().toString(),
+                      // The packing agent keeps one checklist per context
+                      contextId: input.threadId,
                       role: "agent",
-                      parts: [{ text: message, kind: "text" }],
+                      parts: [
+                        { text: message, kind: "text" },
+                        getStateSyncPart(state),
+                      ],
                     },
                   });
+                  if (!("error" in packingResponse)) {
+                    const stateUpdate = getStateUpdate(
+                      (packingResponse as SendMessageSuccessResponse).result
+                    );
+                    if (stateUpdate) {
+                      applyStateUpdate(state, stateUpdate);
+                    }
+                  }
                 }
 
+                // Emit the state once the packing agent's update is applied
+                observer.next({
+                  type: EventType.STATE_SNAPSHOT,
+                  snapshot: state,
+                } as StateSnapshotEvent);
+
                 return `Marked ${itemName} as ${
                   packed ? "packed" : "unpacked"
                 }`;
@@ -356,8 +373,12 @@ export class A2AClientAgent extends AbstractAgent {
                   message: {
                     kind: "message",
                     messageId: Date.now().toString(),
+                    contextId: input.threadId,
                     role: "agent",
-                    parts: [{ text: task, kind: "text" }],
+                    parts:
+                      agentName === "Packing Agent"
+                        ? [{ text: task, kind: "text" }, getStateSyncPart(state)]
+                        : [{ text: task, kind: "text" }],
                   },
                 });
 
@@ -368,21 +389,19 @@ export class A2AClientAgent extends AbstractAgent {
               const result = (sendResponse as SendMessageSuccessResponse)
                 .result;
 
-              if (
-                result.kind === "message" &&
-                result.parts.length > 0 &&
-                result.parts[0].kind === "text"
-              ) {
-                const responseText = result.parts[0].text;
-
+              const responseText = getResponseText(result);
+              if (responseText) {
                 state.a2aMessages.push({
                   name: agentName,
                   to: "Agent",
                   message: responseText,
                 });
 
-                // Update packing state if this is from the packing agent
-                if (
+                // Prefer the structured state update; fall back to parsing the text
+                const stateUpdate = getStateUpdate(result);
+                if (stateUpdate && applyStateUpdate(state, stateUpdate)) {
+                  console.log("Packing state synced:", state.packingState);
+                } else if (
                   agentName === "Packing Agent" ||
                   responseText.includes("update_packing_state:")
                 ) {
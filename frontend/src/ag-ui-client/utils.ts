@@ -1,4 +1,4 @@
-import { AgentCard } from "@a2a-js/sdk";
+import { AgentCard, SendMessageSuccessResponse } from "@a2a-js/sdk";
 import { Message, RunAgentInput } from "@ag-ui/client";
 import { CoreMessage, tool, ToolSet } from "ai";
 import { z } from "zod";
@@ -153,3 +153,147 @@ export function convertToolToVercelAISDKTools(
     {}
   );
 }
+
+/**
+ * Extracts the text of an A2A response. Agents may answer with a plain message
+ * or with a task whose streamed answer is stored as artifact text chunks.
+ */
+export function getResponseText(
+  result: SendMessageSuccessResponse["result"]
+): string | undefined {
+  if (result.kind === "message") {
+    const part = result.parts[0];
+    return part && part.kind === "text" ? part.text : undefined;
+  }
+  const text = (result.artifacts ?? [])
+    .flatMap((artifact) => artifact.parts)
+    .map((part) => (part.kind === "text" ? part.text : ""))
+    .join("");
+  if (text) {
+    return text;
+  }
+  const statusPart = result.status.message?.parts[0];
+  return statusPart && statusPart.kind === "text" ? statusPart.text : undefined;
+}
+
+/**
+ * Structured packing state published by the packing agent as a "state"
+ * artifact: a full snapshot on first contact, then JSON Patch-style
+ * replace operations from `baseVersion` to `version`. Item paths address
+ * items by id (`/items/<id>/packed`).
+ */
+export type PackingStateUpdate =
+  | { type: "snapshot"; version: number; state: any }
+  | {
+      type: "patch";
+      baseVersion: number;
+      version: number;
+      patch: { op: "replace"; path: string; value: unknown }[];
+    };
+
+export function getStateUpdate(
+  result: SendMessageSuccessResponse["result"]
+): PackingStateUpdate | undefined {
+  if (result.kind !== "task") {
+    return undefined;
+  }
+  const part = (result.artifacts ?? []).find(
+    (artifact) => artifact.name === "state"
+  )?.parts[0];
+  return part && part.kind === "data"
+    ? (part.data as PackingStateUpdate)
+    : undefined;
+}
+
+/** Recalculates the totals and category counts from the items we hold */
+function recalculatePackingTotals(packingState: any) {
+  const items: any[] = packingState.items;
+  const categories: Record<string, any> = {};
+  for (const item of items) {
+    if (!categories[item.category]) {
+      categories[item.category] = {
+        packed: 0,
+        total: 0,
+        priority:
+          packingState.categories?.[item.category]?.priority ?? "medium",
+      };
+    }
+    const category = categories[item.category];
+    category.total += 1;
+    category.packed += item.packed ? 1 : 0;
+  }
+  packingState.categories = categories;
+  packingState.totalItems = items.length;
+  packingState.totalPacked = items.filter((item) => item.packed).length;
+  packingState.progress = items.length
+    ? Math.round((packingState.totalPacked / items.length) * 100)
+    : 0;
+}
+
+/**
+ * Applies a state update to `state.packingState`, tracking the version in
+ * `state.packingStateVersion`. Only the agent's packed flags are taken, by
+ * item id, so items packed locally and items the agent doesn't know survive;
+ * a snapshot is adopted whole only when we hold no items yet. Returns false
+ * when a patch doesn't start from the version we hold; the next request then
+ * asks for a fresh snapshot.
+ */
+export function applyStateUpdate(
+  state: any,
+  update: PackingStateUpdate
+): boolean {
+  const items: any[] = state.packingState?.items ?? [];
+  const setPacked = (id: string, packed: boolean) => {
+    const item = items.find((item) => item.id === id);
+    if (item) {
+      item.packed = packed;
+    }
+  };
+
+  if (update.type === "snapshot") {
+    if (items.length === 0) {
+      state.packingState = update.state;
+    } else {
+      for (const item of update.state.items ?? []) {
+        setPacked(item.id, item.packed);
+      }
+    }
+  } else if (
+    update.baseVersion === state.packingStateVersion &&
+    state.packingStateVersion !== undefined
+  ) {
+    for (const { path, value } of update.patch) {
+      const keys = path
+        .split("/")
+        .slice(1)
+        .map((key) => key.replace(/~1/g, "/").replace(/~0/g, "~"));
+      // Totals and category counts are recalculated below from our own items
+      if (keys.length === 3 && keys[0] === "items" && keys[2] === "packed") {
+        setPacked(keys[1], Boolean(value));
+      }
+    }
+  } else {
+    state.packingStateVersion = undefined;
+    return false;
+  }
+  recalculatePackingTotals(state.packingState);
+  state.packingStateVersion = update.version;
+  return true;
+}
+
+/**
+ * DataPart asking the packing agent for the changes since our version. Our
+ * packed item ids go along, so a new agent session starts from our state
+ * instead of wiping it.
+ */
+export const getStateSyncPart = (state: any) => ({
+  kind: "data" as const,
+  data: {
+    ...(state.packingStateVersion === undefined
+      ? { snapshot: true }
+      : { stateVersion: state.packingStateVersion }),
+    packed: (state.packingState?.items ?? [])
+      .filter((item: any) => item.packed)
+      .map((item: any) => item.id),
+  },
+});
@@ -20,16 +20,22 @@ const openaiProvider = createOpenAI({
   apiKey: process.env.OPENAI_API_KEY,
 });
 
+// Agent URLs can be overridden with a comma-separated A2A_AGENT_URLS, e.g. to
+// point at the single-process host (http://localhost:9990/clothing, ...)
+const agentUrls = process.env.A2A_AGENT_URLS
+  ? process.env.A2A_AGENT_URLS.split(",").map((url) => url.trim())
+  : [
+      "http://localhost:9997", // Personal Belongings Agent
+      "http://localhost:9998", // Clothing Agent
+      "http://localhost:9999", // Search Agent
+      "http://localhost:9995", // Documents Agent
+      "http://localhost:9996", // Research Agent
+      "http://localhost:9994", // Packing Agent
+    ];
+
 // Configure A2A agents
 const theDirtyDogs = new A2AClientAgent({
-  agentUrls: [
-    "http://localhost:9997", // Personal Belongings Agent
-    "http://localhost:9998", // Clothing Agent
-    "http://localhost:9999", // Search Agent
-    "http://localhost:9995", // Documents Agent
-    "http://localhost:9996", // Research Agent
-    "http://localhost:9994", // Packing Agent
-  ],
+  agentUrls,
   instructions: `You are the ultimate travel packing coordinator, working with specialized agents to help travelers pack perfectly for any trip. When a user asks "I am traveling to [destination] for [duration] days. I need to pack for the trip.", coordinate with these expert agents:
 
     - Search Agent: Find current information about destination, weather, and travel restrictions